@@ -0,0 +1,66 @@
+"""Compare candle load times: cold local cache, warm Mongo and warm local cache.
+
+Needs a MongoDB server at MONGODB_URI (localhost:27017 by default). Synthetic hourly
+candles are written under their own symbol and removed again afterwards.
+
+    python -m benchmarks.bench_data_cache --years 3
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+os.environ.setdefault('TRADING_BOT_CACHE_DIR', tempfile.mkdtemp(prefix='ohlcv_cache_bench_'))
+
+from src.data_collection import exchange_data  # noqa: E402
+from src.utils.database import Database  # noqa: E402
+from .synthetic import random_walk_ohlcv  # noqa: E402
+
+SYMBOL = 'BENCH-USD'
+GRANULARITY = 3600
+
+
+def synthetic_candles(n_bars, seed=42):
+    return random_walk_ohlcv(n_bars, seed=seed, granularity=GRANULARITY, volatility=0.01, spread=0.005)
+
+
+def timed(label, fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(fn())
+        timings.append(time.perf_counter() - start)
+    print(f"{label:<12} {rows:>10} rows  best {min(timings) * 1000:9.1f} ms  median {np.median(timings) * 1000:9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    candles = synthetic_candles(int(args.years * 365 * 24))
+    start, end = candles.index[0], candles.index[-1]
+
+    db = Database()
+    db.insert_historical_data(SYMBOL, candles, GRANULARITY)
+    try:
+        cache = exchange_data._cache
+
+        def cold():
+            cache.clear(SYMBOL, GRANULARITY)
+            return exchange_data.get_historical_data(SYMBOL, start, end, granularity=GRANULARITY)
+
+        timed('cold', cold, args.repeat)
+        timed('warm-mongo', lambda: exchange_data.fetch_historical_data(SYMBOL, start, end, GRANULARITY), args.repeat)
+        timed('warm-local', lambda: exchange_data.get_historical_data(SYMBOL, start, end, granularity=GRANULARITY),
+              args.repeat)
+    finally:
+        db.delete_historical_data(SYMBOL, GRANULARITY)
+        cache.clear(SYMBOL, GRANULARITY)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Per-million-bar overhead of the execution model in the vectorized engine.
+
+    python -m benchmarks.bench_execution --bars 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.backtesting.execution import ExecutionModel
+from src.backtesting.vectorized import simulate
+from src.strategy.simple_moving_average import SMACrossoverStrategy
+from .synthetic import random_walk_ohlcv
+
+MODELS = {
+    'frictionless': ExecutionModel(),
+    'fees+slippage': ExecutionModel(maker_fee=0.004, taker_fee=0.006, slippage_pct=0.0005),
+    'full': ExecutionModel(maker_fee=0.004, taker_fee=0.006, slippage=0.01, slippage_pct=0.0005,
+                           impact=0.1, max_volume_pct=0.1, intrabar_stops=True),
+}
+
+
+def synthetic_bars(n_bars, seed=7):
+    return random_walk_ohlcv(n_bars, seed=seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--short-window', type=int, default=20)
+    parser.add_argument('--long-window', type=int, default=50)
+    args = parser.parse_args()
+
+    data = synthetic_bars(args.bars)
+    signals = SMACrossoverStrategy(args.short_window, args.long_window).generate_signals(data)
+    signals[:args.long_window - 1] = 0
+    arrays = {'open_': data['open'].to_numpy(), 'high': data['high'].to_numpy(),
+              'low': data['low'].to_numpy(), 'volume': data['volume'].to_numpy()}
+    print(f"{args.bars} bars, {int(np.count_nonzero(signals == 1) + np.count_nonzero(signals == -1))} signal bars")
+
+    baseline = None
+    for name, model in MODELS.items():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            simulate(data['close'].to_numpy(), signals, 1000, execution=model, **arrays)
+            timings.append(time.perf_counter() - start)
+        per_million = min(timings) * 1_000_000 / args.bars
+        baseline = per_million if baseline is None else baseline
+        print(f"{name:<14} {per_million * 1000:8.1f} ms per 1M bars  (+{(per_million - baseline) * 1000:7.1f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""Time every stage of the backtest pipeline on synthetic candles and record the results as JSON.
+
+Covers data loading (local .npy cache and Mongo), signal generation for each strategy, full
+backtests, metrics and result storage. Mongo is replaced by mongomock in-process, so no server
+is needed (pip install mongomock). Results go to benchmarks/results/<commit>.json by default;
+compare two runs with benchmarks.compare.
+
+    python -m benchmarks.bench_pipeline --sizes 1k,100k,1m
+    python -m benchmarks.bench_pipeline --sizes 10m --repeat 1 --only signals,backtest
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+try:
+    import mongomock
+except ImportError:
+    raise ImportError("The pipeline benchmark stores results in an in-process Mongo stand-in; "
+                      "install it with: pip install mongomock")
+
+from src.backtesting.backtester import Backtester
+from src.backtesting.metrics import MetricsAccumulator
+from src.data_collection.cache import OHLCVCache
+from src.data_processing.processor import OHLCV_COLUMNS
+from src.strategy.indicator_cache import IndicatorCache
+from src.strategy.rsi_strategy import RSIStrategy
+from src.strategy.simple_moving_average import SMACrossoverStrategy
+from src.utils.database import Database
+from .synthetic import parse_size, random_walk_ohlcv
+
+SYMBOL = 'BENCH-USD'
+GRANULARITY = 60
+STRATEGIES = {
+    'SMACrossoverStrategy': lambda: SMACrossoverStrategy(short_window=20, long_window=50),
+    'RSIStrategy': lambda: RSIStrategy(),
+}
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def commit_hash():
+    root = os.path.dirname(RESULTS_DIR)
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=root, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f"{commit}-dirty" if dirty else commit
+
+
+def measure(fn, repeat, setup=None):
+    # Best/median wall time over `repeat` runs, then one extra run under tracemalloc for the peak
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+
+    args = setup() if setup else ()
+    tracemalloc.start()
+    try:
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), float(np.median(timings)), peak
+
+
+def seed_candles(db, data):
+    # mongomock enforces unique indexes with a scan per document, so bulk-load without it
+    db.candles.drop_index('symbol_granularity_timestamp')
+    timestamps = data.index.to_pydatetime()
+    rows = data[OHLCV_COLUMNS].to_numpy().tolist()
+    db.candles.insert_many([
+        {'symbol': SYMBOL, 'granularity': GRANULARITY, 'timestamp': timestamp, **dict(zip(OHLCV_COLUMNS, row))}
+        for timestamp, row in zip(timestamps, rows)
+    ])
+
+
+def pipeline_benchmarks(data, db, cache_dir, db_max_bars):
+    # (name, fn, setup) for every stage; setup runs outside the timed region
+    n_bars = len(data)
+    start, end = data.index[0], data.index[-1]
+    benchmarks = []
+
+    local = OHLCVCache(cache_dir)
+    local.write(SYMBOL, GRANULARITY, data, start, end)
+    benchmarks.append(('data_load.local_cache', lambda: local.read(SYMBOL, GRANULARITY, start, end), None))
+    if n_bars <= db_max_bars:
+        seed_candles(db, data)
+        benchmarks.append(('data_load.mongo', lambda: db.get_historical_data(SYMBOL, start, end, GRANULARITY), None))
+
+    for name, make in STRATEGIES.items():
+        benchmarks.append((f'signals.{name}', lambda strategy, cache: strategy.generate_signals(data, cache=cache),
+                           lambda make=make: (make(), IndicatorCache())))
+    for name, make in STRATEGIES.items():
+        benchmarks.append((f'backtest.{name}', lambda backtester: backtester.backtest(data),
+                           lambda make=make: (Backtester(make(), start, end, 1000, symbol=SYMBOL,
+                                                         indicator_cache=IndicatorCache()),)))
+
+    results = Backtester(STRATEGIES['SMACrossoverStrategy'](), start, end, 1000, symbol=SYMBOL,
+                         indicator_cache=IndicatorCache()).backtest(data)
+    values = results['portfolio_value'].to_numpy()
+
+    def metrics():
+        accumulator = MetricsAccumulator(1000)
+        accumulator.update_many(values)
+        return accumulator.metrics()
+
+    benchmarks.append(('metrics', metrics, None))
+    benchmarks.append(('storage.write', lambda: db.insert_backtest_results('bench', results), None))
+    run_id = db.insert_backtest_results('bench', results)
+    benchmarks.append(('storage.read', lambda: db.load_backtest_results(run_id), None))
+    return benchmarks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1k,100k,1m', help="comma-separated bar counts, e.g. 1k,100k,1m,10m")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', help="comma-separated name prefixes to run, e.g. signals,backtest")
+    parser.add_argument('--db-max-bars', type=int, default=10_000,
+                        help="skip the Mongo load benchmark above this size (mongomock queries scale poorly)")
+    parser.add_argument('--output', help="JSON path (default benchmarks/results/<commit>.json)")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    prefixes = tuple(args.only.split(',')) if args.only else None
+    commit = commit_hash()
+    rows = []
+
+    for n_bars in sizes:
+        data = random_walk_ohlcv(n_bars, seed=args.seed, granularity=GRANULARITY)
+        db = Database(client=mongomock.MongoClient())
+        with tempfile.TemporaryDirectory(prefix='bench_pipeline_') as cache_dir:
+            for name, fn, setup in pipeline_benchmarks(data, db, cache_dir, args.db_max_bars):
+                if prefixes and not name.startswith(prefixes):
+                    continue
+                best, median, peak = measure(fn, args.repeat, setup)
+                rows.append({
+                    'benchmark': name,
+                    'bars': n_bars,
+                    'best_seconds': best,
+                    'median_seconds': median,
+                    'bars_per_second': n_bars / best if best > 0 else None,
+                    'peak_memory_mb': peak / 2 ** 20
+                })
+                print(f"{name:<32} {n_bars:>10} bars  best {best * 1000:10.2f} ms  "
+                      f"{n_bars / best:14,.0f} bars/s  peak {peak / 2 ** 20:9.1f} MB")
+
+    report = {
+        'commit': commit,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'results': rows
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit[:12]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Compare two bench_pipeline result files and flag throughput or memory regressions.
+
+Exits with status 1 when any benchmark is slower (bars/sec) or uses more peak memory than
+the baseline by more than --threshold. Timings shorter than --min-seconds are shown but too
+noisy to count as regressions.
+
+    python -m benchmarks.compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report, {(row['benchmark'], row['bars']): row for row in report['results']}
+
+
+def change(old, new):
+    if not old or new is None:
+        return None
+    return new / old - 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.10, help="relative change treated as a regression")
+    parser.add_argument('--min-seconds', type=float, default=0.005)
+    args = parser.parse_args()
+
+    base_report, base = load(args.baseline)
+    new_report, new = load(args.candidate)
+    print(f"baseline  {base_report['commit']}\ncandidate {new_report['commit']}\n")
+    print(f"{'benchmark':<32} {'bars':>10} {'bars/s old':>14} {'bars/s new':>14} {'speed':>8} {'peak MB':>16} {'mem':>8}")
+
+    regressions = []
+    for key in sorted(base.keys() & new.keys(), key=lambda key: (key[1], key[0])):
+        old_row, new_row = base[key], new[key]
+        speed = change(old_row['bars_per_second'], new_row['bars_per_second'])
+        memory = change(old_row['peak_memory_mb'], new_row['peak_memory_mb'])
+        flags = []
+        timed = max(old_row['best_seconds'], new_row['best_seconds']) >= args.min_seconds
+        if timed and speed is not None and speed < -args.threshold:
+            flags.append('SLOWER')
+        if memory is not None and memory > args.threshold:
+            flags.append('MEMORY')
+        if flags:
+            regressions.append(key)
+        print(f"{key[0]:<32} {key[1]:>10} {old_row['bars_per_second']:>14,.0f} {new_row['bars_per_second']:>14,.0f} "
+              f"{speed if speed is not None else 0:>+8.1%} "
+              f"{old_row['peak_memory_mb']:>7.1f} -> {new_row['peak_memory_mb']:<6.1f} "
+              f"{memory if memory is not None else 0:>+8.1%}  {' '.join(flags)}")
+
+    for key in sorted(base.keys() ^ new.keys()):
+        print(f"{key[0]:<32} {key[1]:>10} only in {'baseline' if key in base else 'candidate'}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
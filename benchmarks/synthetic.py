@@ -0,0 +1,26 @@
+"""Seeded random-walk OHLCV generators shared by the benchmarks."""
+import numpy as np
+import pandas as pd
+
+
+def random_walk_ohlcv(n_bars, seed=42, granularity=60, start='2000-01-01', volatility=0.002, spread=0.001):
+    # Geometric random walk for the close, opens at the previous close, highs/lows a half-normal spread outside
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, volatility, n_bars)))
+    open_ = np.concatenate([close[:1], close[:-1]])
+    wick = np.abs(rng.normal(0, spread, n_bars)) * close
+    index = pd.date_range(start, periods=n_bars, freq=f'{granularity}s', name='timestamp')
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + wick,
+        'low': np.minimum(open_, close) - wick,
+        'close': close,
+        'volume': rng.lognormal(3, 1, n_bars),
+    }, index=index)
+
+
+def parse_size(text):
+    # '1k' -> 1000, '10m' -> 10000000
+    text = text.strip().lower().replace('_', '')
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
@@ -1,39 +1,22 @@
-from src.backtesting.backtester import Backtester
-from src.strategy.simple_moving_average import SMACrossoverStrategy
-from src.utils.database import Database
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+"""Backtest trading strategies from the command line.
+
+    python main.py run --strategy sma --param short_window=5 --param long_window=10 --symbol SOL-USD --days 60
+    python main.py batch jobs.json --output-dir reports
+    python main.py serve                      # long-lived worker with warm data and indicator caches
+    python main.py batch jobs.json --remote   # send the jobs to that worker
+    python main.py shutdown
+
+pandas, the strategies and matplotlib are only imported by the commands that need them.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from multiprocessing import AuthenticationError
 from prettytable import PrettyTable
-from datetime import datetime, timedelta
-
-def plot_results(results, asset):
-    plt.figure(figsize=(12, 6))
-    plt.plot(results['date'], results['portfolio_value'], label='Portfolio Value')
-    plt.plot(results['date'], results[f'{asset.lower()}_price'] * (results['portfolio_value'].iloc[0] / results[f'{asset.lower()}_price'].iloc[0]), label=f'{asset.upper()} Price (Normalized)')
-    plt.legend()
-    plt.title(f'Backtesting Results: Portfolio Value vs {asset.upper()} Price')
-    plt.xlabel('Date')
-    plt.ylabel('Value')
-    plt.show()
-
-    plt.figure(figsize=(12, 6))
-    drawdown = (results['portfolio_value'] / results['portfolio_value'].cummax() - 1)
-    plt.plot(results['date'], drawdown)
-    plt.fill_between(results['date'], drawdown, 0, alpha=0.3)
-    plt.title('Portfolio Drawdown')
-    plt.xlabel('Date')
-    plt.ylabel('Drawdown')
-    plt.show()
-
-    plt.figure(figsize=(12, 6))
-    daily_returns = results['portfolio_value'].pct_change()
-    sns.histplot(daily_returns, kde=True)
-    plt.title('Distribution of Daily Returns')
-    plt.xlabel('Daily Return')
-    plt.ylabel('Frequency')
-    plt.show()
+from src.runner.spec import DAILY_GRANULARITY, STRATEGIES, load_jobs
+from src.runner.server import DEFAULT_HOST, DEFAULT_PORT
 
 def print_performance_summary(metrics):
     table = PrettyTable()
@@ -43,83 +26,172 @@ def print_performance_summary(metrics):
     print(table)
 
 def create_trade_log(results, asset):
+    import numpy as np
     trades = results[results['portfolio_value'].diff() != 0].copy()
     trades['trade_type'] = np.where(trades['portfolio_value'].diff() > 0, 'Buy', 'Sell')
     trades['trade_return'] = trades['portfolio_value'].pct_change()
     return trades[['date', 'trade_type', f'{asset.lower()}_price', 'portfolio_value', 'trade_return']]
 
-def main():
+def print_summary(summary):
+    if 'error' in summary:
+        print(f"\n{summary['name'] or summary['strategy']} {summary['symbol'] or ''}: FAILED ({summary['error']})")
+        return
+    print(f"\n{summary['name']}: {summary['bars']} bars {summary['start']} to {summary['end']} "
+          f"in {summary['seconds']:.3f}s (load {summary['load_seconds']:.3f}s)")
+    if not summary['bars']:
+        print("No data to backtest.")
+        return
+    print_performance_summary(summary['metrics'])
+    trade_stats = summary['trade_stats']
+    print(f"Total Trades: {trade_stats['total_trades']}")
+    print(f"Winning Trades: {trade_stats['winning_trades']}")
+    print(f"Losing Trades: {trade_stats['losing_trades']}")
+    print(f"Average Win: {trade_stats['average_win']:.2%}")
+    print(f"Average Loss: {trade_stats['average_loss']:.2%}")
+    print(f"Best Trade: {trade_stats['best_trade']:.2%}")
+    print(f"Worst Trade: {trade_stats['worst_trade']:.2%}")
+    for path in summary['files']:
+        print(f"Wrote {path}")
+
+def parse_param(text):
+    # key=value, with the value read as JSON when it parses (numbers, booleans, lists) and as a string otherwise
+    key, sep, value = text.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected key=value, got {text!r}")
     try:
-        strategy = SMACrossoverStrategy(short_window=5, long_window=10)
-        
-        end_date = datetime.now().strftime("%Y-%m-%d")
-        start_date = (datetime.now() - timedelta(days=60)).strftime("%Y-%m-%d")
-        
-        symbol = "SOL-USD"
-        
-        backtester = Backtester(strategy, start_date=start_date, end_date=end_date, initial_capital=1000, symbol=symbol, initial_position=0)
-       
-        results = backtester.run()
-        print("Results shape:", results.shape)
-        print("Results columns:", results.columns)
-        print("First few rows of results:")
-        print(results.head())
-
-        metrics = backtester.calculate_metrics(results)
-
-        print("\nBacktesting Results:")
-        print_performance_summary(metrics)
-
-        db = Database()
-        stored_results = db.get_backtest_results(f"{strategy.__class__.__name__}_{symbol}")
-        if stored_results and 'results' in stored_results:
-            print("\nRetrieved stored backtest results:")
-            stored_df = pd.DataFrame(stored_results['results'])
-            print(stored_df.head())
-        else:
-            print("\nNo stored backtest results found.")
-        db.close()
-
-        if not results.empty:
-            asset = symbol.split('-')[0].lower()
-            plot_results(results, asset)
-            
-            trade_log = create_trade_log(results, asset)
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+def job_options(args):
+    # Output and instrumentation settings shared by every job of the invocation
+    options = {'output_dir': args.output_dir, 'formats': args.formats, 'profile': args.profile,
+               'report_dir': args.report_dir, 'save': False if args.no_save else None}
+    return {key: value for key, value in options.items() if value is not None}
+
+def command_jobs(args):
+    job = {'strategy': args.strategy, 'days': args.days, 'granularity': args.granularity,
+           'initial_capital': args.capital, 'initial_position': args.position, 'dtype': args.dtype,
+           'vectorized': not args.loop}
+    if args.params:
+        job['params'] = dict(args.params)
+    if args.start:
+        job['start'] = args.start
+    if args.end:
+        job['end'] = args.end
+    return [{**job, 'symbol': symbol, **job_options(args)} for symbol in args.symbols or ['SOL-USD']]
+
+def execute(jobs, args, return_results=False):
+    if args.remote:
+        from src.runner.server import submit
+        return submit(jobs, (args.host, args.port), return_results=return_results)
+    from src.runner.worker import BacktestWorker
+    return BacktestWorker().run_many(jobs, return_results=return_results)
+
+def run_command(args):
+    # Results frames only cross the wire (or stay in memory) when --trades or --plot will use them
+    summaries = execute(command_jobs(args), args, return_results=args.trades or args.plot)
+    for summary in summaries:
+        print_summary(summary)
+        results = summary.get('results')
+        if results is None or results.empty:
+            continue
+        asset = summary['symbol'].split('-')[0].lower()
+        if args.trades:
             print("\nTrade Log:")
-            print(trade_log)
-
-            # Additional analysis
-            print("\nStrategy Performance Metrics:")
-            print(f"Total Trades: {len(trade_log)}")
-            print(f"Winning Trades: {len(trade_log[trade_log['trade_return'] > 0])}")
-            print(f"Losing Trades: {len(trade_log[trade_log['trade_return'] < 0])}")
-            print(f"Average Win: {trade_log[trade_log['trade_return'] > 0]['trade_return'].mean():.2%}")
-            print(f"Average Loss: {trade_log[trade_log['trade_return'] < 0]['trade_return'].mean():.2%}")
-            print(f"Best Trade: {trade_log['trade_return'].max():.2%}")
-            print(f"Worst Trade: {trade_log['trade_return'].min():.2%}")
-
-            # Plotting trade entry and exit points
-            plt.figure(figsize=(12, 6))
-            plt.plot(results['date'], results[f'{asset}_price'], label=f'{asset.upper()} Price')
-            plt.scatter(trade_log[trade_log['trade_type'] == 'Buy']['date'], 
-                        trade_log[trade_log['trade_type'] == 'Buy'][f'{asset}_price'], 
-                        marker='^', color='g', label='Buy')
-            plt.scatter(trade_log[trade_log['trade_type'] == 'Sell']['date'], 
-                        trade_log[trade_log['trade_type'] == 'Sell'][f'{asset}_price'], 
-                        marker='v', color='r', label='Sell')
-            plt.title(f'{asset.upper()} Price with Trade Entry/Exit Points')
-            plt.xlabel('Date')
-            plt.ylabel('Price')
-            plt.legend()
-            plt.show()
-
-        else:
-            print("No data to visualize.")
-
-    except Exception as e:
-        print(f"An error occurred: {str(e)}")
-        import traceback
-        traceback.print_exc()
+            print(create_trade_log(results, asset))
+        if args.plot:
+            from src.visualization.plot import plot_results
+            plot_results(results, asset)
+    return summaries
+
+def batch_command(args):
+    options = job_options(args)
+    summaries = execute([{**job, **options} for job in load_jobs(args.jobs_file)], args)
+    for summary in summaries:
+        print_summary(summary)
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump(summaries, f, indent=2, default=str)
+    return summaries
+
+def serve_command(args):
+    from src.runner.server import serve
+    serve((args.host, args.port))
+    return []
+
+def stats_command(args):
+    from src.runner.server import shutdown, worker_stats
+    print(json.dumps((shutdown if args.command == 'shutdown' else worker_stats)((args.host, args.port)), indent=2))
+    return []
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command')
+
+    worker = argparse.ArgumentParser(add_help=False)
+    worker.add_argument('--host', default=DEFAULT_HOST, help="worker address (default %(default)s)")
+    worker.add_argument('--port', type=int, default=DEFAULT_PORT)
+
+    jobs = argparse.ArgumentParser(add_help=False, parents=[worker])
+    jobs.add_argument('--remote', action='store_true', help="run on the worker started with 'serve'")
+    jobs.add_argument('--output-dir', help="render headless PNG/HTML reports into this directory")
+    jobs.add_argument('--format', dest='formats', action='append', choices=['png', 'html'],
+                      help="report format, repeatable (default png)")
+    jobs.add_argument('--profile', choices=['cprofile', 'pyinstrument'], help="add a call profile to the run report")
+    jobs.add_argument('--report-dir', help="write each run's timing report as <name>.json here")
+    jobs.add_argument('--no-save', action='store_true', help="don't store results in MongoDB")
+
+    run = commands.add_parser('run', parents=[jobs], help="backtest one strategy on one or more symbols")
+    run.add_argument('--strategy', default='sma', choices=sorted(STRATEGIES))
+    run.add_argument('--param', dest='params', action='append', type=parse_param, metavar='KEY=VALUE',
+                     help="strategy parameter, repeatable (default sma short_window=5 long_window=10)")
+    run.add_argument('--symbol', dest='symbols', action='append', help="repeatable (default SOL-USD)")
+    run.add_argument('--start', help="YYYY-MM-DD (default --days before --end)")
+    run.add_argument('--end', help="YYYY-MM-DD (default today)")
+    run.add_argument('--days', type=int, default=60)
+    run.add_argument('--granularity', type=int, default=DAILY_GRANULARITY, help="candle size in seconds")
+    run.add_argument('--capital', type=float, default=1000)
+    run.add_argument('--position', type=float, default=0, help="initial position")
+    run.add_argument('--dtype', default='float64', choices=['float64', 'float32'])
+    run.add_argument('--loop', action='store_true', help="use the bar-by-bar engine instead of the vectorized one")
+    run.add_argument('--trades', action='store_true', help="print the trade log")
+    run.add_argument('--plot', action='store_true', help="show the charts interactively")
+    run.set_defaults(handler=run_command)
+
+    batch = commands.add_parser('batch', parents=[jobs], help="run the jobs of a JSON/JSONL job file")
+    batch.add_argument('jobs_file')
+    batch.add_argument('--summary', help="write the job summaries as JSON to this path")
+    batch.set_defaults(handler=batch_command)
+
+    serve = commands.add_parser('serve', parents=[worker], help="start a worker that keeps caches warm between jobs")
+    serve.set_defaults(handler=serve_command)
+    for name, help_text in (('stats', "show the worker's cache statistics"), ('shutdown', "stop the worker")):
+        commands.add_parser(name, parents=[worker], help=help_text).set_defaults(handler=stats_command)
+    return parser
+
+def main(argv=None):
+    logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'), format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    argv = sys.argv[1:] if argv is None else argv
+    # No command behaves like `run` with its defaults
+    args = build_parser().parse_args(argv if argv and argv[0] in ('run', 'batch', 'serve', 'stats', 'shutdown', '-h', '--help')
+                                     else ['run', *argv])
+    try:
+        summaries = args.handler(args)
+    except ConnectionRefusedError:
+        print(f"No backtest worker on {args.host}:{args.port}; start one with: python main.py serve")
+        return 1
+    except AuthenticationError:
+        print(f"The worker on {args.host}:{args.port} rejected our authkey")
+        return 1
+    except RuntimeError as e:
+        # request() raises this for an {'error': ...} reply from the worker
+        print(e)
+        return 1
+    except (FileNotFoundError, PermissionError) as e:
+        print(e)
+        return 1
+    return 1 if any('error' in summary for summary in summaries) else 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -1,10 +1,35 @@
+import inspect
+import logging
+import time
 import pandas as pd
 import numpy as np
 from ..data_collection.exchange_data import get_historical_data
+from ..data_processing.bars import compact_ohlcv, iter_bars
 from ..utils.database import Database
+from ..utils.instrumentation import current_run, profile_run, stage
+from .execution import ExecutionModel
+from .metrics import MetricsAccumulator
+from .results import ResultsBuffer
+from .vectorized import signal_codes, simulate
+
+logger = logging.getLogger(__name__)
+
+def strategy_params(strategy):
+    # Constructor arguments as stored on the instance (SMACrossoverStrategy keeps long_window as _long_window)
+    params = {}
+    for name in inspect.signature(type(strategy).__init__).parameters:
+        if name == 'self':
+            continue
+        for attr in (name, f'_{name}'):
+            if hasattr(strategy, attr):
+                params[name] = getattr(strategy, attr)
+                break
+    return params
+
 
 class Backtester:
-    def __init__(self, strategy, start_date, end_date, initial_capital, symbol="BTC-USD", initial_position=0):
+    def __init__(self, strategy, start_date, end_date, initial_capital, symbol="BTC-USD", initial_position=0,
+                 execution=None, indicator_cache=None, dtype=np.float64):
         self.strategy = strategy
         self.start_date = start_date
         self.end_date = end_date
@@ -15,113 +40,177 @@ class Backtester:
         self.positions = {self.asset: initial_position}
         self.stop_loss_pct = 0.05  # 5% stop loss
         self.take_profit_pct = 0.1  # 10% take profit
+        self.execution = execution or ExecutionModel()
+        self.indicator_cache = indicator_cache  # None uses the per-process cache
+        self.dtype = dtype  # np.float32 halves the loaded candles and the per-bar results
+        self.metrics, self.accumulator = {}, None  # set by run()
+
+    def run(self, vectorized=True, profiler=None, report_path=None, data=None, persist=True):
+        # Timings, counters and the optional profile end up in self.report (and report_path as JSON).
+        # data skips the load (callers that keep candles in memory); persist=False skips the Mongo write.
+        name = f"{self.strategy.__class__.__name__}_{self.symbol}"
+        with profile_run(name, profiler=profiler, report_path=report_path) as run:
+            results_df = self._run(name, vectorized, data, persist)
+        self.report = run.report()
+        return results_df
 
-    def run(self):
-        data = get_historical_data(self.symbol, self.start_date, self.end_date)
-        print(f"Historical data shape: {data.shape}")
-        print(f"Historical data head:\n{data.head()}")
+    def _run(self, name, vectorized, data=None, persist=True):
+        if data is None:
+            data = get_historical_data(self.symbol, self.start_date, self.end_date)
+        if np.dtype(self.dtype) != np.float64:
+            data = compact_ohlcv(data, self.dtype)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Historical data shape: %s", data.shape)
+            logger.debug("Historical data head:\n%s", data.head())
 
+        self.metrics, self.accumulator = {}, None
         if data.empty:
-            print("No historical data available. Returning empty results.")
+            logger.warning("No historical data available. Returning empty results.")
             return pd.DataFrame()
 
-        results = []
+        results_df = self.backtest(data, vectorized=vectorized)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Results DataFrame shape: %s", results_df.shape)
+            logger.debug("Results DataFrame head:\n%s", results_df.head())
+
+        with stage('metrics'):
+            self.metrics = metrics = self.calculate_metrics(results_df)
+        if persist:
+            with stage('persistence'):
+                db = Database()
+                db.insert_backtest_results(
+                    name, results_df,
+                    params=strategy_params(self.strategy), symbol=self.symbol,
+                    start_date=self.start_date, end_date=self.end_date,
+                    metrics=metrics
+                )
+                db.close()
+
+        return results_df
+
+    def backtest(self, data, vectorized=True):
+        if vectorized and hasattr(self.strategy, 'generate_signals'):
+            return self._run_vectorized(data)
+        if not self.execution.is_frictionless:
+            raise ValueError("Fees, slippage and intrabar stops are only modelled by the vectorized engine")
+        return self._run_loop(data)
+
+    def generate_signals(self, data):
+        # Strategies that declare their indicators read them from the shared cache
+        if hasattr(self.strategy, 'required_indicators'):
+            return self.strategy.generate_signals(data, cache=self.indicator_cache)
+        return self.strategy.generate_signals(data)
+
+    def _run_vectorized(self, data):
+        current_run().count('bars', len(data))
+        with stage('signals'):
+            output = self.generate_signals(data)
+        support = resistance = None
+        if isinstance(output, tuple):
+            output, support, resistance = output
+            support = np.array(support, dtype=self.dtype)
+            resistance = np.array(resistance, dtype=self.dtype)
+        signals = signal_codes(output)
+
+        # Match the loop, which only asks for a signal once long_window bars are available
+        warmup = min(max(self.strategy.long_window - 1, 0), len(data))
+        signals[:warmup] = 0
+        if support is not None:
+            support[:warmup] = np.nan
+            resistance[:warmup] = np.nan
+
+        close = data['close'].to_numpy()
+        ohlcv = {}
+        if not self.execution.is_frictionless:
+            ohlcv = {key: data[column].to_numpy()
+                     for key, column in (('open_', 'open'), ('high', 'high'), ('low', 'low'), ('volume', 'volume'))
+                     if column in data}
+        with stage('execution'):
+            capital, position, portfolio_value = simulate(
+                close, signals, self.current_capital, self.positions.get(self.asset, 0),
+                stop_loss_pct=self.stop_loss_pct, take_profit_pct=self.take_profit_pct,
+                execution=self.execution, dtype=self.dtype, **ohlcv
+            )
+        if len(close):
+            self.current_capital = capital[-1]
+            self.positions[self.asset] = position[-1]
+
+        return ResultsBuffer.from_arrays(self.asset, data.index, portfolio_value, close, position,
+                                         support, resistance, dtype=self.dtype).frame()
+
+    def _run_loop(self, data):
+        results = ResultsBuffer(self.asset, capacity=len(data), dtype=self.dtype)
         entry_price = None
+        streaming = hasattr(self.strategy, 'update')
+        if streaming:
+            self.strategy.reset()
+        run = current_run()
+        run.count('bars', len(data))
 
-        for i in range(len(data)):
-            current_data = data.iloc[:i+1]
-            if len(current_data) >= self.strategy.long_window:
-                signal = self.strategy.generate_signal(current_data)
+        perf_counter = time.perf_counter
+        signal_seconds = execution_seconds = 0.
+        for i, bar in enumerate(iter_bars(data)):
+            started = perf_counter()
+            if streaming:
+                # Every bar goes through update() so the indicator state stays current during warm-up
+                signal = self.strategy.update(bar)
+            if i + 1 >= self.strategy.long_window and not streaming:
+                signal = self.strategy.generate_signal(data.iloc[:i+1])
+            signalled = perf_counter()
+            if i + 1 >= self.strategy.long_window:
                 support, resistance = np.nan, np.nan  # SMACrossoverStrategy doesn't provide support/resistance
+                if isinstance(signal, tuple):
+                    signal, support, resistance = signal
             else:
                 signal, support, resistance = 0, np.nan, np.nan
 
-            row = data.iloc[i]
-            
             # Check for stop loss or take profit
             if entry_price is not None:
                 if signal != 1:  # We're in a position
-                    if row['close'] <= entry_price * (1 - self.stop_loss_pct):
-                        print("Stop Loss triggered")
+                    if bar.close <= entry_price * (1 - self.stop_loss_pct):
+                        logger.debug("Stop Loss triggered")
                         signal = -1
-                    elif row['close'] >= entry_price * (1 + self.take_profit_pct):
-                        print("Take Profit triggered")
+                    elif bar.close >= entry_price * (1 + self.take_profit_pct):
+                        logger.debug("Take Profit triggered")
                         signal = -1
 
             if signal == 1:  # Buy signal
                 buy_amount = min(self.current_capital, self.initial_capital * 0.8)
                 if buy_amount > 0:
-                    quantity = buy_amount / row['close']
+                    quantity = buy_amount / bar.close
                     self.positions[self.asset] = self.positions.get(self.asset, 0) + quantity
                     self.current_capital -= buy_amount
-                    entry_price = row['close']
+                    entry_price = bar.close
             elif signal == -1:  # Sell signal
                 sell_quantity = min(self.positions.get(self.asset, 0), self.positions.get(self.asset, 0) * 0.8)
                 if sell_quantity > 0:
-                    sell_amount = sell_quantity * row['close']
+                    sell_amount = sell_quantity * bar.close
                     self.positions[self.asset] -= sell_quantity
                     self.current_capital += sell_amount
                     entry_price = None
 
-            portfolio_value = self.current_capital + self.positions.get(self.asset, 0) * row['close']
-
-            results.append({
-                'date': row.name,
-                'portfolio_value': portfolio_value,
-                f'{self.asset.lower()}_price': row['close'],
-                'position': self.positions.get(self.asset, 0),
-                'support': support,
-                'resistance': resistance
-            })
-
-        results_df = pd.DataFrame(results)
-        print(f"Results DataFrame shape: {results_df.shape}")
-        print(f"Results DataFrame head:\n{results_df.head()}")
-        
-        db = Database()
-        db.insert_backtest_results(f"{self.strategy.__class__.__name__}_{self.symbol}", results_df)
-        db.close()
-        
-        return results_df
+            portfolio_value = self.current_capital + self.positions.get(self.asset, 0) * bar.close
+
+            results.append(bar.timestamp, portfolio_value, bar.close, self.positions.get(self.asset, 0),
+                           support, resistance)
+            signal_seconds += signalled - started
+            execution_seconds += perf_counter() - signalled
+
+        run.add_stage('signals', signal_seconds, len(data))
+        run.add_stage('execution', execution_seconds, len(data))
+
+        return results.frame()
     
     def calculate_metrics(self, results):
         if results.empty:
-            print("No results to calculate metrics. Returning empty metrics.")
+            logger.warning("No results to calculate metrics. Returning empty metrics.")
             return {
                 'total_return': 0,
                 'sharpe_ratio': 0,
                 'max_drawdown': 0
             }
 
-        total_return = (results['portfolio_value'].iloc[-1] - self.initial_capital) / self.initial_capital
-        daily_returns = results['portfolio_value'].pct_change()
-        sharpe_ratio = (daily_returns.mean() / daily_returns.std()) * np.sqrt(252)  # Annualized
-        max_drawdown = (results['portfolio_value'] / results['portfolio_value'].cummax() - 1).min()
-
-        annualized_return = (1 + total_return) ** (365 / len(results)) - 1
-        volatility = daily_returns.std() * np.sqrt(252)
-        sortino_ratio = (daily_returns.mean() / daily_returns[daily_returns < 0].std()) * np.sqrt(252)
-        
-        peak = results['portfolio_value'].cummax()
-        drawdown = (results['portfolio_value'] - peak) / peak
-        calmar_ratio = annualized_return / abs(drawdown.min()) if drawdown.min() != 0 else np.inf
-
-        trades = results['portfolio_value'].diff() != 0
-        wins = (results['portfolio_value'].diff()[trades] > 0).sum()
-        win_rate = wins / trades.sum() if trades.sum() > 0 else 0
-
-        gains = results['portfolio_value'].diff()[results['portfolio_value'].diff() > 0].sum()
-        losses = abs(results['portfolio_value'].diff()[results['portfolio_value'].diff() < 0].sum())
-        profit_factor = gains / losses if losses != 0 else np.inf
-
-        return {
-            'total_return': total_return,
-            'annualized_return': annualized_return,
-            'sharpe_ratio': sharpe_ratio,
-            'sortino_ratio': sortino_ratio,
-            'calmar_ratio': calmar_ratio,
-            'max_drawdown': max_drawdown,
-            'volatility': volatility,
-            'win_rate': win_rate,
-            'profit_factor': profit_factor
-        }
\ No newline at end of file
+        accumulator = MetricsAccumulator(self.initial_capital)
+        accumulator.update_many(results['portfolio_value'].to_numpy(dtype=float))
+        self.accumulator = accumulator  # trade_stats() of the last run
+        return accumulator.metrics()
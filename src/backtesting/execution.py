@@ -0,0 +1,76 @@
+class ExecutionModel:
+    """Fill prices, fees and size limits applied by the vectorized engine.
+
+    Fees are fractions of notional: signal orders and stop-losses pay the taker fee, take-profits
+    rest as limit orders and pay the maker fee. Market fills move against us by a fixed amount,
+    a fraction of price and an impact term proportional to order size / bar volume. With
+    intrabar_stops, stops and targets trigger on the bar's low/high and fill at the trigger
+    price (or the open when the bar gaps through it). The default model is frictionless and
+    reproduces the original close-price fills exactly.
+    """
+
+    def __init__(self, maker_fee=0., taker_fee=0., slippage=0., slippage_pct=0., impact=0.,
+                 max_volume_pct=None, intrabar_stops=False):
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.slippage = slippage
+        self.slippage_pct = slippage_pct
+        self.impact = impact
+        self.max_volume_pct = max_volume_pct
+        self.intrabar_stops = intrabar_stops
+
+    @property
+    def is_frictionless(self):
+        return (not self.maker_fee and not self.taker_fee and not self.slippage and not self.slippage_pct
+                and not self.impact and self.max_volume_pct is None and not self.intrabar_stops)
+
+    def _market_slippage(self, price, quantity, volume):
+        pct = self.slippage_pct
+        if self.impact and volume > 0:
+            pct = pct + self.impact * quantity / volume
+        return price * pct + self.slippage
+
+    def _cap(self, quantity, volume):
+        if self.max_volume_pct is None:
+            return quantity, False
+        limit = self.max_volume_pct * volume
+        return (limit, True) if quantity > limit else (quantity, False)
+
+    def buy(self, budget, price, volume):
+        # Returns (quantity, cash spent, fill price); the budget covers notional plus taker fee.
+        # A volume cap of zero (e.g. a bar with no volume) is no fill: (0, 0, None)
+        notional = budget / (1 + self.taker_fee)
+        fill_price = price + self._market_slippage(price, notional / price, volume)
+        quantity = notional / fill_price
+        quantity, capped = self._cap(quantity, volume)
+        if quantity <= 0:
+            return 0., 0., None
+        if capped:
+            notional = quantity * fill_price
+            return quantity, notional * (1 + self.taker_fee), fill_price
+        return quantity, budget, fill_price
+
+    def sell(self, quantity, price, volume, maker=False, slipped=True):
+        # Returns (quantity, cash received, fill price); the quantity may be less than asked under a volume cap
+        quantity, _ = self._cap(quantity, volume)
+        fill_price = price - self._market_slippage(price, quantity, volume) if slipped else price
+        proceeds = quantity * fill_price
+        fee = proceeds * (self.maker_fee if maker else self.taker_fee)
+        return quantity, proceeds - fee, fill_price
+
+    def exit_hits(self, entry_price, stop_loss_pct, take_profit_pct, close, high, low):
+        # Boolean mask over a slice of bars where a stop-loss or take-profit triggers
+        stop = entry_price * (1 - stop_loss_pct)
+        take = entry_price * (1 + take_profit_pct)
+        if self.intrabar_stops:
+            return (low <= stop) | (high >= take)
+        return (close <= stop) | (close >= take)
+
+    def exit_fill(self, entry_price, stop_loss_pct, take_profit_pct, open_, close, low):
+        # (price, is resting limit order) for a bar already known to hit; stops win ties (worst case)
+        if not self.intrabar_stops:
+            return close, False
+        stop = entry_price * (1 - stop_loss_pct)
+        if low <= stop:
+            return min(open_, stop), False
+        return max(open_, entry_price * (1 + take_profit_pct)), True
@@ -0,0 +1,219 @@
+import math
+
+import numpy as np
+
+PERIODS_PER_YEAR = 252
+DAYS_PER_YEAR = 365
+METRIC_NAMES = ('total_return', 'annualized_return', 'sharpe_ratio', 'sortino_ratio', 'calmar_ratio',
+                'max_drawdown', 'volatility', 'win_rate', 'profit_factor')
+
+
+class _Moments:
+    # Count/mean/sum of squared deviations, mergeable across batches (Chan et al.)
+    __slots__ = ('n', 'mean', 'm2')
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.
+        self.m2 = 0.
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, values, leading_gap=False):
+        # NaNs are skipped; like pandas we sum over zeros in their place, which keeps the rounding identical
+        if leading_gap:
+            values = np.concatenate([[np.nan], values])
+        missing = np.isnan(values)
+        count = len(values) - int(missing.sum())
+        if count == 0:
+            return
+        if missing.any():
+            values = np.where(missing, 0., values)
+        batch_mean = values.sum() / count
+        squares = (batch_mean - values) ** 2
+        squares[missing] = 0.
+        batch_m2 = squares.sum()
+        if self.n == 0:
+            self.n, self.mean, self.m2 = count, batch_mean, batch_m2
+            return
+        total = self.n + count
+        delta = batch_mean - self.mean
+        self.mean = self.mean + delta * count / total
+        self.m2 = self.m2 + batch_m2 + delta * delta * self.n * count / total
+        self.n = total
+
+    def result(self):
+        mean = np.float64(self.mean) if self.n else np.float64(np.nan)
+        std = np.float64(math.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else np.float64(np.nan)
+        return mean, std
+
+
+class MetricsAccumulator:
+    """Single-pass, constant-memory version of Backtester.calculate_metrics and the main.py trade stats.
+
+    Feed portfolio values one at a time with update() (live runs) or in arrays with
+    update_many() (backtests, optimizer); metrics() and trade_stats() can be read at any point.
+    """
+
+    def __init__(self, initial_capital, periods_per_year=PERIODS_PER_YEAR):
+        self.initial_capital = initial_capital
+        self.periods_per_year = periods_per_year
+        self.count = 0
+        self.last_value = None
+        self.returns = _Moments()
+        self.downside = _Moments()
+        self.peak = -np.inf
+        self.max_drawdown = np.nan  # min of value / peak - 1, skipping NaN (0 / 0)
+        self.min_drawdown = np.nan  # min of (value - peak) / peak, as used for Calmar
+        self.changes = 0
+        self.gaining_changes = 0
+        self.gains = 0.
+        self.losses = 0.
+        # Trade log: bars where the portfolio value changed (plus the first bar)
+        self.trades = 0
+        self.last_trade_value = None
+        self.winning_trades = 0
+        self.losing_trades = 0
+        self.win_return_sum = 0.
+        self.loss_return_sum = 0.
+        self.best_trade = np.nan
+        self.worst_trade = np.nan
+
+    def update(self, value):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if self.last_value is not None:
+                change = value - self.last_value
+                ret = value / self.last_value - 1
+                if ret == ret:  # 0 / 0 has no return
+                    self.returns.add(ret)
+                if ret < 0:
+                    self.downside.add(ret)
+                if change != 0:
+                    self.changes += 1
+                    if change > 0:
+                        self.gaining_changes += 1
+                        self.gains += change
+                    elif change < 0:
+                        self.losses += change
+                    self._record_trade(value)
+            else:
+                self._record_trade(value)
+
+            self.peak = max(self.peak, value)
+            self.max_drawdown = np.fmin(self.max_drawdown, value / self.peak - 1)
+            self.min_drawdown = np.fmin(self.min_drawdown, (value - self.peak) / self.peak)
+        self.count += 1
+        self.last_value = value
+
+    def _record_trade(self, value):
+        self.trades += 1
+        if self.last_trade_value is not None:
+            trade_return = value / self.last_trade_value - 1
+            if trade_return > 0:
+                self.winning_trades += 1
+                self.win_return_sum += trade_return
+            elif trade_return < 0:
+                self.losing_trades += 1
+                self.loss_return_sum += trade_return
+            self.best_trade = np.fmax(self.best_trade, trade_return)
+            self.worst_trade = np.fmin(self.worst_trade, trade_return)
+        self.last_trade_value = value
+
+    def update_many(self, values):
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        first_batch = self.last_value is None
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if first_batch:
+                previous, current = values[:-1], values[1:]
+            else:
+                previous, current = np.concatenate([[self.last_value], values[:-1]]), values
+
+            changes = current - previous
+            returns = current / previous - 1
+            # The first bar has no return; pandas counts it as a zero-filled NaN in its sums, and so do we
+            self.returns.merge(returns, leading_gap=first_batch)
+            self.downside.merge(returns[returns < 0])
+
+            changed = changes != 0
+            self.changes += int(changed.sum())
+            self.gaining_changes += int((changes > 0).sum())
+            self.gains += changes[changes > 0].sum()
+            self.losses += changes[changes < 0].sum()
+
+            trade_values = current[changed]
+            if first_batch:
+                trade_values = np.concatenate([values[:1], trade_values])
+                previous_trades, returning = trade_values[:-1], trade_values[1:]
+            else:
+                previous_trades = np.concatenate([[self.last_trade_value], trade_values[:-1]])
+                returning = trade_values
+            self.trades += len(trade_values)
+            if len(returning):
+                trade_returns = returning / previous_trades - 1
+                wins = trade_returns[trade_returns > 0]
+                losses = trade_returns[trade_returns < 0]
+                self.winning_trades += len(wins)
+                self.losing_trades += len(losses)
+                self.win_return_sum += wins.sum()
+                self.loss_return_sum += losses.sum()
+                self.best_trade = np.fmax(self.best_trade, np.nanmax(trade_returns))
+                self.worst_trade = np.fmin(self.worst_trade, np.nanmin(trade_returns))
+            if len(trade_values):
+                self.last_trade_value = trade_values[-1]
+
+            peak = np.maximum.accumulate(np.concatenate([[self.peak], values]))[1:]
+            self.peak = peak[-1]
+            self.max_drawdown = np.fmin(self.max_drawdown, np.fmin.reduce(values / peak - 1))
+            self.min_drawdown = np.fmin(self.min_drawdown, np.fmin.reduce((values - peak) / peak))
+        self.count += len(values)
+        self.last_value = values[-1]
+
+    def metrics(self):
+        if self.count == 0:
+            return {'total_return': 0, 'sharpe_ratio': 0, 'max_drawdown': 0}
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            total_return = np.float64((self.last_value - self.initial_capital) / self.initial_capital)
+            mean_return, std_return = self.returns.result()
+            _, downside_std = self.downside.result()
+            annualization = np.sqrt(self.periods_per_year)
+
+            sharpe_ratio = (mean_return / std_return) * annualization
+            annualized_return = (1 + total_return) ** (DAYS_PER_YEAR / self.count) - 1
+            volatility = std_return * annualization
+            sortino_ratio = (mean_return / downside_std) * annualization
+            calmar_ratio = annualized_return / abs(self.min_drawdown) if self.min_drawdown != 0 else np.inf
+
+            trades = self.changes + 1
+            win_rate = np.float64(self.gaining_changes) / trades
+            profit_factor = np.float64(self.gains) / abs(self.losses) if self.losses != 0 else np.inf
+
+        return {
+            'total_return': total_return,
+            'annualized_return': annualized_return,
+            'sharpe_ratio': sharpe_ratio,
+            'sortino_ratio': sortino_ratio,
+            'calmar_ratio': calmar_ratio,
+            'max_drawdown': np.float64(self.max_drawdown),
+            'volatility': volatility,
+            'win_rate': win_rate,
+            'profit_factor': profit_factor
+        }
+
+    def trade_stats(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return {
+                'total_trades': self.trades,
+                'winning_trades': self.winning_trades,
+                'losing_trades': self.losing_trades,
+                'average_win': np.float64(self.win_return_sum) / self.winning_trades if self.winning_trades else np.nan,
+                'average_loss': np.float64(self.loss_return_sum) / self.losing_trades if self.losing_trades else np.nan,
+                'best_trade': np.float64(self.best_trade),
+                'worst_trade': np.float64(self.worst_trade)
+            }
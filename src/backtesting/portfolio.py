@@ -0,0 +1,130 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from ..data_collection.exchange_data import DAILY_GRANULARITY, get_historical_data
+from ..data_processing.processor import OHLCV_COLUMNS
+from ..utils.database import Database
+from ..utils.instrumentation import current_run, profile_run, stage
+from .backtester import Backtester, strategy_params
+from .vectorized import signal_codes, simulate_panel
+
+logger = logging.getLogger(__name__)
+
+
+def align_ohlcv(frames):
+    # Outer-join every symbol on one time index into (field, symbol) columns. Prices are carried
+    # forward over gaps; bars before a symbol's first candle stay NaN and are never traded.
+    panel = pd.concat({symbol: frame[OHLCV_COLUMNS] for symbol, frame in frames.items()}, axis=1)
+    panel = panel.swaplevel(axis=1).sort_index()
+    prices = panel[['open', 'high', 'low', 'close']].ffill()
+    volume = panel[['volume']].fillna(0)
+    aligned = pd.concat([prices, volume], axis=1)
+    return aligned.reindex(columns=pd.MultiIndex.from_product([OHLCV_COLUMNS, list(frames)]))
+
+
+class PortfolioBacktester(Backtester):
+    # Runs one strategy over N symbols at once; each symbol trades an equal cash sleeve
+    def __init__(self, strategy, start_date, end_date, initial_capital, symbols, granularity=DAILY_GRANULARITY,
+                 indicator_cache=None):
+        super().__init__(strategy, start_date, end_date, initial_capital, symbol=symbols[0],
+                         indicator_cache=indicator_cache)
+        self.symbols = list(symbols)
+        self.assets = [symbol.split('-')[0] for symbol in self.symbols]
+        self.granularity = granularity
+
+    def load_data(self):
+        frames = {}
+        for symbol in self.symbols:
+            data = get_historical_data(symbol, self.start_date, self.end_date, granularity=self.granularity)
+            if data.empty:
+                logger.warning("No historical data for %s; leaving it out of the portfolio.", symbol)
+                continue
+            frames[symbol] = data
+        if not frames:
+            return pd.DataFrame()
+        return align_ohlcv(frames)
+
+    def run(self, profiler=None, report_path=None):
+        name = f"{self.strategy.__class__.__name__}_portfolio"
+        with profile_run(name, profiler=profiler, report_path=report_path) as run:
+            results_df = self._run(name)
+        self.report = run.report()
+        return results_df
+
+    def _run(self, name):
+        data = self.load_data()
+        if data.empty:
+            logger.warning("No historical data available. Returning empty results.")
+            return pd.DataFrame()
+
+        results_df = self.backtest(data)
+        with stage('metrics'):
+            metrics = self.calculate_metrics(results_df)
+        with stage('persistence'):
+            db = Database()
+            db.insert_backtest_results(
+                name, results_df,
+                params=strategy_params(self.strategy), symbol=','.join(self.symbols),
+                start_date=self.start_date, end_date=self.end_date,
+                metrics=metrics
+            )
+            db.close()
+        return results_df
+
+    def generate_signal_matrix(self, data):
+        close = data['close']
+        if getattr(self.strategy, 'supports_panel', False):
+            output = self.generate_signals(data)
+            signals = output[0] if isinstance(output, tuple) else output
+        else:
+            # Strategies without a 2-D implementation are evaluated one symbol at a time
+            signals = np.column_stack([
+                self._column_signals(data.xs(symbol, axis=1, level=1))
+                for symbol in close.columns
+            ])
+        signals = signal_codes(signals)
+
+        # Same warm-up as the single-asset engine, counted from each symbol's first candle
+        listed = close.notna().to_numpy()
+        first_bar = np.where(listed.any(axis=0), listed.argmax(axis=0), len(close))
+        warmup = max(self.strategy.long_window - 1, 0)
+        signals[np.arange(len(close))[:, None] < first_bar + warmup] = 0
+        return signals
+
+    def _column_signals(self, frame):
+        listed = frame['close'].notna().to_numpy()
+        signals = np.zeros(len(frame), dtype=np.int8)
+        if listed.any():
+            output = self.generate_signals(frame[listed])
+            signals[listed] = signal_codes(output[0] if isinstance(output, tuple) else output)
+        return signals
+
+    def backtest(self, data, vectorized=True):
+        close = data['close']
+        symbols = list(close.columns)
+        assets = [symbol.split('-')[0].lower() for symbol in symbols]
+        prices = close.to_numpy(dtype=float)
+
+        current_run().count('bars', prices.size)
+        with stage('signals'):
+            signals = self.generate_signal_matrix(data)
+        sleeve = self.initial_capital / len(symbols)
+        with stage('execution'):
+            capital, position, asset_value = simulate_panel(
+                prices, signals, sleeve, stop_loss_pct=self.stop_loss_pct, take_profit_pct=self.take_profit_pct
+            )
+
+        if len(prices):
+            self.current_capital = capital[-1].sum()
+            self.positions = dict(zip(assets, position[-1]))
+
+        columns = {
+            'date': data.index,
+            'portfolio_value': asset_value.sum(axis=1),
+            'cash': capital.sum(axis=1),
+        }
+        for k, asset in enumerate(assets):
+            columns[f'{asset}_price'] = prices[:, k]
+            columns[f'{asset}_position'] = position[:, k]
+        return pd.DataFrame(columns)
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+OPTIONAL_COLUMNS = ('support', 'resistance')
+
+
+class ResultsBuffer:
+    """Per-bar backtest results in typed column arrays instead of a list of row dicts.
+
+    Arrays are preallocated (and grown by doubling for open-ended live runs); dtype=np.float32
+    halves their size. support/resistance are only allocated once a value is recorded, so
+    strategies that never provide them produce no such columns.
+    """
+
+    def __init__(self, asset, capacity=1024, dtype=np.float64):
+        self.price_column = f'{asset.lower()}_price'
+        self.dtype = np.dtype(dtype)
+        self.size = 0
+        self.dates = np.empty(capacity, dtype='datetime64[ns]')
+        self.tz = None  # tz-aware dates are stored as naive UTC and get their timezone back in frame()
+        self.columns = {name: np.empty(capacity, dtype=self.dtype)
+                        for name in ('portfolio_value', self.price_column, 'position')}
+        self.optional = dict.fromkeys(OPTIONAL_COLUMNS)
+
+    @classmethod
+    def from_arrays(cls, asset, dates, portfolio_value, price, position, support=None, resistance=None,
+                    dtype=np.float64):
+        # Wraps whole-run arrays without copying when they already have the requested dtype
+        buffer = cls(asset, capacity=0, dtype=dtype)
+        buffer.size = len(dates)
+        buffer.dates = dates
+        for name, values in (('portfolio_value', portfolio_value), (buffer.price_column, price), ('position', position)):
+            buffer.columns[name] = np.asarray(values).astype(buffer.dtype, copy=False)
+        for name, values in (('support', support), ('resistance', resistance)):
+            if values is not None and not np.isnan(values).all():
+                buffer.optional[name] = np.asarray(values).astype(buffer.dtype, copy=False)
+        return buffer
+
+    def _grow(self):
+        capacity = max(2 * len(self.dates), 1024)
+        self.dates = np.resize(self.dates, capacity)
+        for columns in (self.columns, self.optional):
+            for name, values in columns.items():
+                if values is not None:
+                    columns[name] = np.resize(values, capacity)
+
+    def append(self, date, portfolio_value, price, position, support=np.nan, resistance=np.nan):
+        i = self.size
+        if i == len(self.dates):
+            self._grow()
+        if date is None:
+            self.dates[i] = np.datetime64('NaT')
+        elif getattr(date, 'tzinfo', None) is not None:
+            self.tz = date.tzinfo
+            self.dates[i] = pd.Timestamp(date).tz_convert(None)
+        else:
+            self.dates[i] = date
+        self.columns['portfolio_value'][i] = portfolio_value
+        self.columns[self.price_column][i] = price
+        self.columns['position'][i] = position
+        for name, value in (('support', support), ('resistance', resistance)):
+            values = self.optional[name]
+            if values is None:
+                if value != value:
+                    continue
+                values = self.optional[name] = np.full(len(self.dates), np.nan, dtype=self.dtype)
+            values[i] = value
+        self.size = i + 1
+
+    def frame(self):
+        n = self.size
+        dates = self.dates[:n]
+        if self.tz is not None:
+            dates = pd.DatetimeIndex(dates).tz_localize('UTC').tz_convert(self.tz)
+        columns = {'date': dates}
+        columns.update((name, values[:n]) for name, values in self.columns.items())
+        columns.update((name, values[:n]) for name, values in self.optional.items() if values is not None)
+        return pd.DataFrame(columns, copy=False)
+
+    @property
+    def nbytes(self):
+        arrays = [self.dates, *self.columns.values(), *(v for v in self.optional.values() if v is not None)]
+        return sum(getattr(values, 'nbytes', 0) for values in arrays)
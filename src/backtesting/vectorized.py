@@ -0,0 +1,216 @@
+import numpy as np
+
+BUY_FRACTION = 0.8
+SELL_FRACTION = 0.8
+
+
+def signal_codes(signals):
+    # Signals as int8 +1 (buy) / -1 (sell) / 0; anything else, NaN included, is no order, as in simulate
+    signals = np.asarray(signals)
+    if signals.dtype == np.int8:
+        return signals.copy()
+    codes = np.zeros(signals.shape, dtype=np.int8)
+    codes[signals == 1] = 1
+    codes[signals == -1] = -1
+    return codes
+
+
+def _floats(values):
+    # Float arrays keep their width (float32 candles stay float32); anything else becomes float64
+    values = np.asarray(values)
+    return values if values.dtype.kind == 'f' else values.astype(float)
+
+
+def simulate(close, signals, initial_capital, initial_position=0, stop_loss_pct=0.05, take_profit_pct=0.1,
+             execution=None, open_=None, high=None, low=None, volume=None, dtype=np.float64):
+    """Run the Backtester fill/position/stop-loss/take-profit rules over whole arrays.
+
+    State only changes on signal bars and on stop-loss/take-profit hits, so we jump
+    from event to event and search each gap for the next exit with a NumPy scan.
+    An ExecutionModel adds fees, slippage, volume caps and intrabar stops; it needs
+    the open/high/low/volume arrays it uses. Returns the per-bar capital, position
+    and portfolio value arrays in dtype (float32 halves their memory). Price arrays are
+    used in their own float width; cash and position are tracked in float64 either way.
+    """
+    close = _floats(close)
+    signals = np.asarray(signals)
+    n = len(close)
+    frictionless = execution is None or execution.is_frictionless
+    if not frictionless:
+        open_ = close if open_ is None else _floats(open_)
+        high = close if high is None else _floats(high)
+        low = close if low is None else _floats(low)
+        volume = np.full(n, np.inf) if volume is None else _floats(volume)
+
+    capital = initial_capital
+    position = initial_position
+    entry_price = None
+    change_idx, capital_at, position_at = [], [], []
+
+    def buy(i):
+        nonlocal capital, position, entry_price
+        buy_amount = min(capital, initial_capital * BUY_FRACTION)
+        if buy_amount > 0:
+            if frictionless:
+                fill_price = close.item(i)
+                quantity = buy_amount / fill_price
+            else:
+                quantity, buy_amount, fill_price = execution.buy(buy_amount, close.item(i), volume.item(i))
+                if fill_price is None:
+                    return
+            position = position + quantity
+            capital -= buy_amount
+            entry_price = fill_price
+
+    def sell(i, price=None, limit=False):
+        nonlocal capital, position, entry_price
+        sell_quantity = min(position, position * SELL_FRACTION)
+        if sell_quantity > 0:
+            filled = True
+            if frictionless:
+                sell_amount = sell_quantity * close.item(i)
+            else:
+                price = close.item(i) if price is None else price
+                requested = sell_quantity
+                sell_quantity, sell_amount, _ = execution.sell(sell_quantity, price, volume.item(i),
+                                                               maker=limit, slipped=not limit)
+                filled = sell_quantity >= requested
+            position -= sell_quantity
+            capital += sell_amount
+            if filled:
+                # A volume-capped exit leaves part of the order unsold, so its stop and target stay live
+                entry_price = None
+
+    def exit_hits(start, stop):
+        if frictionless:
+            segment = close[start:stop]
+            return (segment <= entry_price * (1 - stop_loss_pct)) | (segment >= entry_price * (1 + take_profit_pct))
+        return execution.exit_hits(entry_price, stop_loss_pct, take_profit_pct,
+                                   close[start:stop], high[start:stop], low[start:stop])
+
+    def exit_at(k):
+        if frictionless:
+            sell(k)
+        else:
+            price, limit = execution.exit_fill(entry_price, stop_loss_pct, take_profit_pct,
+                                               open_.item(k), close.item(k), low.item(k))
+            sell(k, price, limit)
+        change_idx.append(k)
+        capital_at.append(capital)
+        position_at.append(position)
+
+    events = np.flatnonzero((signals == 1) | (signals == -1)).tolist()
+    i = 0
+    for j in events + [n]:
+        # Between two signal bars only an open position can change state
+        while entry_price is not None and i < j:
+            hits = exit_hits(i, j)
+            k = int(np.argmax(hits))
+            if not hits[k]:
+                break
+            k += i
+            exit_at(k)
+            i = k + 1
+
+        if j == n:
+            break
+
+        if signals[j] == 1:
+            buy(j)
+        elif not frictionless and execution.intrabar_stops and entry_price is not None and exit_hits(j, j + 1)[0]:
+            # The stop or target traded during the bar, before the close-price sell signal
+            exit_at(j)
+            i = j + 1
+            continue
+        else:
+            sell(j)
+        change_idx.append(j)
+        capital_at.append(capital)
+        position_at.append(position)
+        i = j + 1
+
+    # Forward-fill the state recorded at each change point over every bar
+    run_lengths = np.diff(np.asarray([0] + change_idx + [n], dtype=np.int64))
+    capital_series = np.repeat(np.asarray([initial_capital] + capital_at, dtype=dtype), run_lengths)
+    position_series = np.repeat(np.asarray([initial_position] + position_at, dtype=dtype), run_lengths)
+    portfolio_value = np.multiply(position_series, close, dtype=dtype)
+    portfolio_value += capital_series
+
+    return capital_series, position_series, portfolio_value
+
+
+def simulate_panel(close, signals, sleeve_capital, stop_loss_pct=0.05, take_profit_pct=0.1):
+    """Cross-sectional version of simulate for a (bars, assets) price matrix.
+
+    Every asset trades its own cash sleeve under the single-asset rules, so one column
+    with the full capital reproduces simulate exactly. State is updated with vector
+    operations across assets and only on bars where some asset signals or exits.
+    """
+    close = np.asarray(close, dtype=float)
+    signals = np.where(np.isnan(close), 0, np.asarray(signals))
+    n_bars, n_assets = close.shape
+
+    capital = np.full(n_assets, sleeve_capital, dtype=float)
+    position = np.zeros(n_assets)
+    entry_price = np.full(n_assets, np.nan)
+    change_idx, capital_at, position_at = [], [], []
+
+    def apply(row, sig):
+        in_position = ~np.isnan(entry_price)
+        buy = sig == 1
+        sell = (sig == -1) & ~buy
+
+        buy_amount = np.where(buy, np.minimum(capital, sleeve_capital * BUY_FRACTION), 0.)
+        buy = buy & (buy_amount > 0)
+        sell_quantity = np.where(sell, np.minimum(position, position * SELL_FRACTION), 0.)
+        sell = sell & (sell_quantity > 0)
+
+        price = close[row]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            position[buy] = position[buy] + buy_amount[buy] / price[buy]
+        capital[buy] -= buy_amount[buy]
+        entry_price[buy] = price[buy]
+
+        position[sell] -= sell_quantity[sell]
+        capital[sell] += sell_quantity[sell] * price[sell]
+        entry_price[sell & in_position] = np.nan
+
+        change_idx.append(row)
+        capital_at.append(capital.copy())
+        position_at.append(position.copy())
+
+    def exits(rows, sig=None):
+        stop = entry_price * (1 - stop_loss_pct)
+        take = entry_price * (1 + take_profit_pct)
+        with np.errstate(invalid='ignore'):
+            hits = (rows <= stop) | (rows >= take)
+        if sig is not None:
+            hits &= sig != 1
+        return hits
+
+    event_rows = np.flatnonzero(((signals == 1) | (signals == -1)).any(axis=1)).tolist()
+    i = 0
+    for j in event_rows + [n_bars]:
+        if i < j and not np.isnan(entry_price).all():
+            # First stop-loss/take-profit hit per asset in the gap; entries only change for the asset that exits,
+            # so the other assets' first hits stay valid and one scan covers the whole gap
+            hits = exits(close[i:j])
+            first_hit = np.where(hits.any(axis=0), hits.argmax(axis=0), -1)
+            for offset in np.unique(first_hit[first_hit >= 0]):
+                row = i + int(offset)
+                apply(row, np.where(first_hit == offset, -1., 0.))
+
+        if j == n_bars:
+            break
+
+        sig = signals[j].copy()
+        sig[exits(close[j], signals[j])] = -1
+        apply(j, sig)
+        i = j + 1
+
+    slot = np.searchsorted(np.asarray(change_idx, dtype=np.int64), np.arange(n_bars), side='right')
+    capital_series = np.vstack([np.full(n_assets, sleeve_capital, dtype=float)] + capital_at)[slot]
+    position_series = np.vstack([np.zeros(n_assets)] + position_at)[slot]
+    asset_value = capital_series + position_series * np.nan_to_num(close)
+
+    return capital_series, position_series, asset_value
@@ -0,0 +1,154 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from ..optimization.optimizer import ParameterOptimizer, SharedArray, attach_shared_array
+from ..strategy.indicator_cache import DEFAULT_MAX_ENTRIES, IndicatorCache
+from .metrics import MetricsAccumulator
+from .vectorized import signal_codes, simulate
+
+logger = logging.getLogger(__name__)
+
+
+def make_folds(n_bars, train_size, test_size, step=None, anchored=False):
+    # (train_start, train_end, test_start, test_end) bar offsets; ends are exclusive
+    step = step or test_size
+    if step < test_size:
+        raise ValueError("step must be at least test_size so out-of-sample windows don't overlap")
+    folds = []
+    train_end = train_size
+    while train_end + test_size <= n_bars:
+        train_start = 0 if anchored else train_end - train_size
+        folds.append((train_start, train_end, train_end, train_end + test_size))
+        train_end += step
+    return folds
+
+
+def _metrics(portfolio_value, initial_capital):
+    accumulator = MetricsAccumulator(initial_capital)
+    accumulator.update_many(portfolio_value)
+    return accumulator.metrics()
+
+
+def evaluate_fold(fold, close, signals, initial_capital, metric, stop_loss_pct, take_profit_pct):
+    train_start, train_end, test_start, test_end = fold
+
+    best, best_score, best_train, first_train = 0, -np.inf, None, None
+    for combo in range(len(signals)):
+        _, _, value = simulate(close[train_start:train_end], signals[combo, train_start:train_end], initial_capital,
+                               stop_loss_pct=stop_loss_pct, take_profit_pct=take_profit_pct)
+        train_metrics = _metrics(value, initial_capital)
+        if combo == 0:
+            first_train = train_metrics
+        score = train_metrics[metric]
+        # NaN scores (e.g. the Sharpe of a combo that never trades) never win
+        if score == score and (best_train is None or score > best_score):
+            best, best_score, best_train = combo, score, train_metrics
+    if best_train is None:
+        # No combo scored: fall back to the first one
+        best_train = first_train
+
+    _, _, test_value = simulate(close[test_start:test_end], signals[best, test_start:test_end], initial_capital,
+                                stop_loss_pct=stop_loss_pct, take_profit_pct=take_profit_pct)
+    return best, best_train, _metrics(test_value, initial_capital), test_value
+
+
+_fold_context = {}
+
+
+def _init_fold_worker(close_spec, signals_spec, settings):
+    close_shm, close = attach_shared_array(close_spec)
+    signals_shm, signals = attach_shared_array(signals_spec)
+    _fold_context.update(shm=(close_shm, signals_shm), close=close, signals=signals, settings=settings)
+
+
+def _evaluate_fold_in_worker(fold):
+    return evaluate_fold(fold, _fold_context['close'], _fold_context['signals'], **_fold_context['settings'])
+
+
+class WalkForward:
+    # Optimise on each train window, score the winner on the following test window. Signals for every parameter
+    # combination are computed once over the full history and sliced per fold, so overlapping windows share them.
+    def __init__(self, strategy_class, param_grid, train_size, test_size, step=None, anchored=False,
+                 initial_capital=1000, metric='sharpe_ratio', constraint=None, max_workers=None,
+                 stop_loss_pct=0.05, take_profit_pct=0.1):
+        self.strategy_class = strategy_class
+        self.combinations = ParameterOptimizer.grid(param_grid, constraint)
+        self.train_size = train_size
+        self.test_size = test_size
+        self.step = step
+        self.anchored = anchored
+        self.initial_capital = initial_capital
+        self.metric = metric
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.stop_loss_pct = stop_loss_pct
+        self.take_profit_pct = take_profit_pct
+
+    def precompute_signals(self, data):
+        signals = np.empty((len(self.combinations), len(data)), dtype=np.int8)
+        strategies = [self.strategy_class(**params) for params in self.combinations]
+        cache = None
+        if hasattr(self.strategy_class, 'required_indicators'):
+            # Every distinct indicator series in the grid is computed once and shared by all combinations
+            requirements = {(name, tuple(sorted(params.items())))
+                            for strategy in strategies for name, params in strategy.required_indicators()}
+            # Composite indicators also cache their inputs, so leave room for those too
+            cache = IndicatorCache(max_entries=max(3 * len(requirements), DEFAULT_MAX_ENTRIES))
+            cache.warm(data, ((name, dict(params)) for name, params in requirements))
+        for k, strategy in enumerate(strategies):
+            output = strategy.generate_signals(data) if cache is None else strategy.generate_signals(data, cache=cache)
+            signals[k] = signal_codes(output[0] if isinstance(output, tuple) else output)
+            signals[k, :max(strategy.long_window - 1, 0)] = 0
+        return signals
+
+    def run(self, data):
+        folds = make_folds(len(data), self.train_size, self.test_size, self.step, self.anchored)
+        if not folds or not self.combinations:
+            logger.warning("Not enough data for a single walk-forward fold.")
+            return pd.DataFrame(), pd.Series(dtype=float)
+
+        close = data['close'].to_numpy(dtype=float)
+        signals = self.precompute_signals(data)
+        settings = {
+            'initial_capital': self.initial_capital,
+            'metric': self.metric,
+            'stop_loss_pct': self.stop_loss_pct,
+            'take_profit_pct': self.take_profit_pct
+        }
+
+        workers = min(self.max_workers, len(folds))
+        if workers <= 1:
+            outcomes = [evaluate_fold(fold, close, signals, **settings) for fold in folds]
+        else:
+            with SharedArray(close) as shared_close, SharedArray(signals) as shared_signals:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_fold_worker,
+                                         initargs=(shared_close.spec, shared_signals.spec, settings)) as pool:
+                    outcomes = list(pool.map(_evaluate_fold_in_worker, folds))
+
+        return self._fold_table(data, folds, outcomes), self._stitch(data, folds, outcomes)
+
+    def _fold_table(self, data, folds, outcomes):
+        rows = []
+        for number, (fold, (best, train_metrics, test_metrics, _)) in enumerate(zip(folds, outcomes), start=1):
+            train_start, train_end, test_start, test_end = fold
+            rows.append({
+                'fold': number,
+                'train_start': data.index[train_start],
+                'train_end': data.index[train_end - 1],
+                'test_start': data.index[test_start],
+                'test_end': data.index[test_end - 1],
+                **self.combinations[best],
+                f'train_{self.metric}': train_metrics[self.metric],
+                **{f'test_{key}': value for key, value in test_metrics.items()}
+            })
+        return pd.DataFrame(rows).set_index('fold')
+
+    def _stitch(self, data, folds, outcomes):
+        # Chain the test windows: each one starts from the value the previous one ended with
+        pieces, scale = [], 1.
+        for (_, _, test_start, test_end), (_, _, _, test_value) in zip(folds, outcomes):
+            pieces.append(pd.Series(test_value * scale, index=data.index[test_start:test_end]))
+            scale *= test_value[-1] / self.initial_capital
+        return pd.concat(pieces).rename('portfolio_value')
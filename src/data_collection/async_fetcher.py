@@ -0,0 +1,120 @@
+import asyncio
+import random
+import time
+
+import aiohttp
+import pandas as pd
+
+COINBASE_API_URL = "https://api.pro.coinbase.com"
+MAX_CANDLES_PER_REQUEST = 300
+CANDLE_COLUMNS = ['timestamp', 'low', 'high', 'open', 'close', 'volume']
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CandleFetchError(Exception):
+    pass
+
+
+class AsyncCandleFetcher:
+    # Splits long ranges into <=300-candle windows and downloads them concurrently,
+    # bounded by a semaphore and a requests-per-second throttle, retrying with exponential backoff
+    def __init__(self, base_url=COINBASE_API_URL, max_concurrency=5, requests_per_second=10,
+                 max_retries=5, backoff_base=0.5, backoff_max=30, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._semaphore = None
+        self._throttle_lock = None
+        self._next_slot = 0.
+
+    @staticmethod
+    def windows(start, end, granularity):
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        step = pd.Timedelta(seconds=granularity)
+        span = step * (MAX_CANDLES_PER_REQUEST - 1)
+        windows = []
+        while start <= end:
+            window_end = min(start + span, end)
+            windows.append((start, window_end))
+            start = window_end + step
+        return windows
+
+    async def _throttle(self):
+        if not self.requests_per_second:
+            return
+        async with self._throttle_lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + 1. / self.requests_per_second
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        delay = min(self.backoff_base * 2 ** attempt, self.backoff_max)
+        return delay * (0.5 + random.random() / 2)
+
+    async def _get_json(self, session, url, params):
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            async with self._semaphore:
+                await self._throttle()
+                try:
+                    async with session.get(url, params=params) as response:
+                        if response.status == 200:
+                            return await response.json()
+                        body = await response.text()
+                        if response.status not in RETRY_STATUSES or last_attempt:
+                            raise CandleFetchError(f"{url} returned {response.status}: {body}")
+                        delay = self._backoff(attempt, response.headers.get('Retry-After'))
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if last_attempt:
+                        raise CandleFetchError(f"{url} failed after {self.max_retries + 1} attempts: {e}") from e
+                    delay = self._backoff(attempt)
+            # Sleep outside the semaphore so a backing-off window doesn't hold a connection slot
+            await asyncio.sleep(delay)
+
+    async def fetch_symbol(self, session, symbol, start, end, granularity):
+        url = f"{self.base_url}/products/{symbol}/candles"
+        calls = [
+            self._get_json(session, url, {
+                'start': window_start.isoformat(),
+                'end': window_end.isoformat(),
+                'granularity': granularity
+            })
+            for window_start, window_end in self.windows(start, end, granularity)
+        ]
+        pages = await asyncio.gather(*calls)
+        return candles_to_frame(row for page in pages for row in page)
+
+    async def fetch_many(self, symbols, start, end, granularity):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._throttle_lock = asyncio.Lock()
+        async with aiohttp.ClientSession(timeout=self.timeout) as session:
+            frames = await asyncio.gather(*(
+                self.fetch_symbol(session, symbol, start, end, granularity) for symbol in symbols
+            ))
+        return dict(zip(symbols, frames))
+
+
+def candles_to_frame(rows):
+    df = pd.DataFrame(list(rows), columns=CANDLE_COLUMNS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
+    df.set_index('timestamp', inplace=True)
+    # Overlapping windows and retried pages can repeat candles
+    df = df[~df.index.duplicated(keep='last')]
+    df.sort_index(inplace=True)
+    return df
+
+
+def fetch_candles(symbols, start, end, granularity=86400, **fetcher_kwargs):
+    fetcher = AsyncCandleFetcher(**fetcher_kwargs)
+    return asyncio.run(fetcher.fetch_many(list(symbols), start, end, granularity))
@@ -0,0 +1,119 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from ..data_processing.processor import OHLCV_COLUMNS
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'TRADING_BOT_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'trading_bot', 'ohlcv')
+)
+
+
+class OHLCVCache:
+    # On-disk columnar candle store: one directory per (symbol, granularity) holding an int64
+    # timestamp array, an (n, 5) float64 OHLCV matrix and a JSON list of the time ranges fetched so far.
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _dir(self, symbol, granularity):
+        return os.path.join(self.cache_dir, f"{symbol}_{int(granularity)}")
+
+    def _meta(self, symbol, granularity):
+        path = os.path.join(self._dir(symbol, granularity), 'meta.json')
+        if not os.path.exists(path):
+            return {'n_rows': 0, 'coverage': []}
+        with open(path) as f:
+            return json.load(f)
+
+    def _load_arrays(self, symbol, granularity):
+        meta = self._meta(symbol, granularity)
+        directory = self._dir(symbol, granularity)
+        if meta['n_rows'] == 0:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(OHLCV_COLUMNS))), meta
+        # Copy-on-write maps: pages are read lazily and callers can still modify the frame they get back
+        timestamps = np.load(os.path.join(directory, 'timestamp.npy'), mmap_mode='c')
+        values = np.load(os.path.join(directory, 'ohlcv.npy'), mmap_mode='c')
+        if len(timestamps) != meta['n_rows'] or len(values) != meta['n_rows']:
+            # A concurrent writer is half-way through replacing the files
+            return np.empty(0, dtype=np.int64), np.empty((0, len(OHLCV_COLUMNS))), {'n_rows': 0, 'coverage': []}
+        return timestamps, values, meta
+
+    def coverage(self, symbol, granularity):
+        return [(pd.Timestamp(start), pd.Timestamp(end)) for start, end in self._meta(symbol, granularity)['coverage']]
+
+    def missing_ranges(self, symbol, granularity, start, end):
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        missing = []
+        cursor = start
+        for covered_start, covered_end in self.coverage(symbol, granularity):
+            if covered_end < cursor:
+                continue
+            if covered_start > end:
+                break
+            if covered_start > cursor:
+                missing.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if cursor < end:
+            missing.append((cursor, end))
+        return missing
+
+    def read(self, symbol, granularity, start=None, end=None):
+        timestamps, values, _ = self._load_arrays(symbol, granularity)
+        lo = 0 if start is None else np.searchsorted(timestamps, pd.Timestamp(start).value, side='left')
+        hi = len(timestamps) if end is None else np.searchsorted(timestamps, pd.Timestamp(end).value, side='right')
+        index = pd.DatetimeIndex(timestamps[lo:hi].view('datetime64[ns]'), name='timestamp')
+        return pd.DataFrame(values[lo:hi], index=index, columns=OHLCV_COLUMNS, copy=False)
+
+    def write(self, symbol, granularity, data, start, end):
+        directory = self._dir(symbol, granularity)
+        os.makedirs(directory, exist_ok=True)
+
+        existing = self.read(symbol, granularity)
+        incoming = data[OHLCV_COLUMNS].astype(np.float64)
+        incoming.index = pd.DatetimeIndex(incoming.index, name='timestamp').as_unit('ns')
+        merged = pd.concat([existing, incoming])
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+
+        coverage = self._meta(symbol, granularity)['coverage'] + [[pd.Timestamp(start).isoformat(),
+                                                                   pd.Timestamp(end).isoformat()]]
+        meta = {'n_rows': len(merged), 'coverage': _merge_intervals(coverage)}
+
+        self._replace(directory, 'timestamp.npy', lambda f: np.save(f, merged.index.asi8))
+        self._replace(directory, 'ohlcv.npy', lambda f: np.save(f, np.ascontiguousarray(merged.to_numpy())))
+        self._replace(directory, 'meta.json', lambda f: f.write(json.dumps(meta).encode()))
+
+    @staticmethod
+    def _replace(directory, name, writer):
+        tmp_path = os.path.join(directory, f".{name}.tmp")
+        with open(tmp_path, 'wb') as f:
+            writer(f)
+        os.replace(tmp_path, os.path.join(directory, name))
+
+    def get(self, symbol, granularity, start, end, fetch):
+        # Only the intervals not yet covered go to `fetch(start, end)`; everything else is a file read
+        for gap_start, gap_end in self.missing_ranges(symbol, granularity, start, end):
+            fetched = fetch(gap_start, gap_end)
+            if fetched is None or fetched.empty:
+                continue
+            # Don't claim coverage past the newest candle, so ranges ending in the future are refetched later
+            last_available = fetched.index.max() + pd.Timedelta(seconds=granularity)
+            self.write(symbol, granularity, fetched, gap_start, min(gap_end, last_available))
+        return self.read(symbol, granularity, start, end)
+
+    def clear(self, symbol, granularity):
+        directory = self._dir(symbol, granularity)
+        for name in ('meta.json', 'timestamp.npy', 'ohlcv.npy'):
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _merge_intervals(intervals):
+    merged = []
+    for start, end in sorted((pd.Timestamp(s), pd.Timestamp(e)) for s, e in intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [[start.isoformat(), end.isoformat()] for start, end in merged]
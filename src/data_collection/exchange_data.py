@@ -1,38 +1,69 @@
+import logging
+import numpy as np
 import pandas as pd
-import requests
 from datetime import datetime
-from ..utils.database import Database
+from ..data_processing.processor import OHLCV_COLUMNS
+from ..utils.database import DAILY_GRANULARITY, Database
+from ..utils.instrumentation import stage
+from .async_fetcher import CandleFetchError, fetch_candles
+from .cache import OHLCVCache
 
-def get_historical_data(symbol, start_date, end_date):
-    print(f"Fetching data for {symbol} from {start_date} to {end_date}")
-    
+_cache = OHLCVCache()
+logger = logging.getLogger(__name__)
+
+
+def get_historical_data(symbol, start_date, end_date, granularity=DAILY_GRANULARITY, use_cache=True):
+    logger.debug("Fetching data for %s from %s to %s", symbol, start_date, end_date)
+
+    with stage('data_load'):
+        if not use_cache:
+            return fetch_historical_data(symbol, start_date, end_date, granularity)
+
+        return _cache.get(
+            symbol, granularity, start_date, end_date,
+            lambda start, end: fetch_historical_data(symbol, start, end, granularity)
+        )
+
+
+def fetch_historical_data(symbol, start_date, end_date, granularity=DAILY_GRANULARITY):
     db = Database()
-    data = db.get_historical_data(symbol, start_date, end_date)
-    
-    if data.empty:
-        # If data is not in MongoDB, fetch it from the API
-        url = f"https://api.pro.coinbase.com/products/{symbol}/candles"
-        params = {
-            'start': start_date,
-            'end': end_date,
-            'granularity': 86400  # daily candles
-        }
-        response = requests.get(url, params=params)
-        if response.status_code != 200:
-            print(f"Error response from API: {response.text}")
+    data = db.get_historical_data(symbol, start_date, end_date, granularity)
+
+    holes = missing_intervals(data.index, start_date, end_date, granularity)
+    if holes:
+        # Mongo holds none or only part of the range; the rest comes from the API in <=300-candle pages
+        try:
+            fetched = [fetch_candles([symbol], start, end, granularity)[symbol] for start, end in holes]
+        except CandleFetchError as e:
+            logger.error("Error response from API: %s", e)
+            db.close()
             return pd.DataFrame()
-        
-        data = response.json()
-        df = pd.DataFrame(data, columns=['timestamp', 'low', 'high', 'open', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
-        df.set_index('timestamp', inplace=True)
-        df.sort_index(inplace=True)
-        
-        # Store the fetched data in MongoDB
-        db.insert_historical_data(symbol, df)
-    else:
-        df = data
-        df.set_index('timestamp', inplace=True)
-    
+
+        fetched = [df[OHLCV_COLUMNS] for df in fetched if not df.empty]
+        if fetched:
+            # Store the fetched data in MongoDB
+            df = pd.concat(fetched)
+            db.insert_historical_data(symbol, df, granularity)
+            data = pd.concat([data, df])
+            data = data[~data.index.duplicated(keep='last')].sort_index()
+
     db.close()
-    return df
\ No newline at end of file
+    return data
+
+
+def missing_intervals(index, start_date, end_date, granularity=DAILY_GRANULARITY):
+    # (start, end) ranges of [start_date, end_date] with no candle in `index`: before the first candle,
+    # between candles more than one granularity apart, and after the last one
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    step = pd.Timedelta(seconds=granularity)
+    if len(index) == 0:
+        return [(start, end)]
+    index = pd.DatetimeIndex(index).sort_values()
+    holes = []
+    if index[0] - step >= start:
+        holes.append((start, index[0] - step))
+    gaps = np.flatnonzero(np.diff(index.asi8) > step.value)
+    holes.extend((index[i] + step, index[i + 1] - step) for i in gaps)
+    if index[-1] + step <= end:
+        holes.append((index[-1] + step, end))
+    return holes
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from .processor import OHLCV_COLUMNS
+
+BAR_FIELDS = ('timestamp', *OHLCV_COLUMNS)
+
+
+def bar_dtype(price_dtype=np.float64):
+    return np.dtype([('timestamp', 'datetime64[ns]')] + [(column, price_dtype) for column in OHLCV_COLUMNS])
+
+
+BAR_DTYPE = bar_dtype()
+
+
+class Bar:
+    # One candle in slots instead of a dict or Series; bar['close'] and bar.get() work the same way
+    __slots__ = BAR_FIELDS
+
+    def __init__(self, timestamp, open, high, low, close, volume=np.nan):
+        self.timestamp = timestamp
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def __getitem__(self, key):
+        if key not in BAR_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in BAR_FIELDS else default
+
+    def __repr__(self):
+        return (f"Bar({self.timestamp}, open={self.open}, high={self.high}, low={self.low}, "
+                f"close={self.close}, volume={self.volume})")
+
+
+def to_records(data, price_dtype=np.float64):
+    # OHLCV frame -> structured array of BAR_DTYPE rows (float32 prices halve the footprint)
+    records = np.empty(len(data), dtype=bar_dtype(price_dtype))
+    index = pd.DatetimeIndex(data.index)
+    records['timestamp'] = (index.tz_convert(None) if index.tz is not None else index).as_unit('ns').to_numpy()
+    for column in OHLCV_COLUMNS:
+        records[column] = data[column].to_numpy() if column in data else np.nan
+    return records
+
+
+def iter_bars(data):
+    # Bars from an OHLCV frame or a BAR_DTYPE record array, without building a Series per row
+    if isinstance(data, np.ndarray):
+        timestamps = pd.DatetimeIndex(data['timestamp'])
+        columns = [data[column].tolist() for column in OHLCV_COLUMNS]
+    else:
+        timestamps = data.index
+        columns = [data[column].to_numpy(dtype=float).tolist() if column in data else [np.nan] * len(data)
+                   for column in OHLCV_COLUMNS]
+    for timestamp, *values in zip(timestamps, *columns):
+        yield Bar(timestamp, *values)
+
+
+def compact_ohlcv(data, dtype=np.float32):
+    # Store prices and volume in a narrower float type; float32 keeps ~7 significant digits
+    return data.astype({column: dtype for column in OHLCV_COLUMNS if column in data})
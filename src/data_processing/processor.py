@@ -1,10 +1,18 @@
 import pandas as pd
 
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+OHLCV_AGGREGATION = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
 def process_ohlcv(data):
-    df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    df = pd.DataFrame(data, columns=['timestamp'] + OHLCV_COLUMNS)
     df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
     df.set_index('timestamp', inplace=True)
     return df
 
+def resample_ohlcv(df, seconds):
+    # Epoch-aligned buckets labelled by their start, so incremental updates land in the same bars
+    resampled = df[list(OHLCV_AGGREGATION)].resample(f'{int(seconds)}s', label='left', closed='left', origin='epoch')
+    return resampled.agg(OHLCV_AGGREGATION).dropna(subset=['open'])
+
 # Usage
 # processed_data = process_ohlcv(data)
\ No newline at end of file
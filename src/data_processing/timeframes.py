@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+from ..data_collection.exchange_data import get_historical_data
+from .processor import OHLCV_COLUMNS, resample_ohlcv
+
+TIMEFRAMES = {'1m': 60, '5m': 300, '15m': 900, '1h': 3600, '4h': 14400, '1d': 86400}
+NS_PER_SECOND = 1_000_000_000
+
+
+class _BarBuffer:
+    # Growable columnar bar store; frame() is a view, so reading a timeframe never copies
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.timestamps = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty((capacity, len(OHLCV_COLUMNS)))
+
+    def _reserve(self, extra):
+        needed = self.size + extra
+        if needed <= len(self.timestamps):
+            return
+        capacity = max(needed, 2 * len(self.timestamps))
+        timestamps = np.empty(capacity, dtype=np.int64)
+        values = np.empty((capacity, len(OHLCV_COLUMNS)))
+        timestamps[:self.size] = self.timestamps[:self.size]
+        values[:self.size] = self.values[:self.size]
+        self.timestamps, self.values = timestamps, values
+
+    def extend(self, timestamps, values):
+        self._reserve(len(timestamps))
+        self.timestamps[self.size:self.size + len(timestamps)] = timestamps
+        self.values[self.size:self.size + len(timestamps)] = values
+        self.size += len(timestamps)
+
+    @property
+    def last_timestamp(self):
+        return self.timestamps[self.size - 1] if self.size else None
+
+    def frame(self):
+        index = pd.DatetimeIndex(self.timestamps[:self.size].view('datetime64[ns]'), name='timestamp')
+        return pd.DataFrame(self.values[:self.size], index=index, columns=OHLCV_COLUMNS, copy=False)
+
+
+def _aggregate(buckets, values):
+    # OHLCV of consecutive runs of equal bucket ids (bars are time-ordered)
+    starts = np.flatnonzero(np.concatenate([[True], buckets[1:] != buckets[:-1]]))
+    ends = np.concatenate([starts[1:], [len(buckets)]]) - 1
+    aggregated = np.column_stack([
+        values[starts, 0],
+        np.maximum.reduceat(values[:, 1], starts),
+        np.minimum.reduceat(values[:, 2], starts),
+        values[ends, 3],
+        np.add.reduceat(values[:, 4], starts),
+    ])
+    return buckets[starts], aggregated
+
+
+class TimeframeAggregator:
+    # Keeps the base candles plus derived timeframes in memory; update() folds new base bars into only the
+    # buckets they fall in (merging into the still-open last bucket or appending new ones)
+    def __init__(self, base_granularity=60, timeframes=('5m', '1h', '4h', '1d')):
+        self.base_granularity = base_granularity
+        self.timeframes = {}
+        for name in timeframes:
+            seconds = TIMEFRAMES[name] if name in TIMEFRAMES else int(name)
+            if seconds % base_granularity:
+                raise ValueError(f"Timeframe {name} is not a multiple of the {base_granularity}s base candles")
+            self.timeframes[name] = seconds
+        self.base = _BarBuffer()
+        self.derived = {name: _BarBuffer() for name in self.timeframes}
+
+    def ingest(self, data):
+        if data.empty:
+            return
+        if self.base.size:
+            self.update(data)
+            return
+        base = data[OHLCV_COLUMNS].sort_index()
+        self.base.extend(base.index.as_unit('ns').asi8, base.to_numpy(dtype=float))
+        for name, seconds in self.timeframes.items():
+            resampled = resample_ohlcv(base, seconds)
+            self.derived[name].extend(resampled.index.as_unit('ns').asi8, resampled.to_numpy(dtype=float))
+
+    def update(self, bars):
+        if bars.empty:
+            return
+        bars = bars[OHLCV_COLUMNS].sort_index()
+        timestamps = bars.index.as_unit('ns').asi8
+        if self.base.size and timestamps[0] <= self.base.last_timestamp:
+            raise ValueError("update() only accepts bars newer than the last ingested one")
+        values = bars.to_numpy(dtype=float)
+        self.base.extend(timestamps, values)
+
+        for name, seconds in self.timeframes.items():
+            width = seconds * NS_PER_SECOND
+            buckets, aggregated = _aggregate(timestamps - timestamps % width, values)
+            buffer = self.derived[name]
+            if buffer.size and buckets[0] == buffer.last_timestamp:
+                last = buffer.values[buffer.size - 1]
+                first = aggregated[0]
+                last[1] = max(last[1], first[1])
+                last[2] = min(last[2], first[2])
+                last[3] = first[3]
+                last[4] += first[4]
+                buckets, aggregated = buckets[1:], aggregated[1:]
+            buffer.extend(buckets, aggregated)
+
+    def get(self, timeframe):
+        if timeframe in self.derived:
+            return self.derived[timeframe].frame()
+        if TIMEFRAMES.get(timeframe) == self.base_granularity or timeframe == self.base_granularity:
+            return self.base.frame()
+        raise KeyError(f"Timeframe {timeframe} is not tracked")
+
+
+class MultiTimeframeData:
+    # Fetches the finest candles for a symbol once and serves every derived timeframe from memory
+    def __init__(self, symbol, start_date, end_date, base_granularity=60, timeframes=('5m', '1h', '4h', '1d')):
+        self.symbol = symbol
+        self.aggregator = TimeframeAggregator(base_granularity, timeframes)
+        self.end_date = pd.Timestamp(end_date)
+        self.aggregator.ingest(get_historical_data(symbol, start_date, end_date, granularity=base_granularity))
+
+    def get(self, timeframe):
+        return self.aggregator.get(timeframe)
+
+    def refresh(self, end_date=None):
+        # Pull only the base candles after the newest one held and fold them in
+        end_date = pd.Timestamp(end_date) if end_date is not None else pd.Timestamp.now(tz='UTC').tz_localize(None)
+        last = self.aggregator.base.last_timestamp
+        start = pd.Timestamp(last) + pd.Timedelta(seconds=self.aggregator.base_granularity) if last is not None else self.end_date
+        if start > end_date:
+            return
+        new_bars = get_historical_data(self.symbol, start, end_date, granularity=self.aggregator.base_granularity)
+        if last is not None and not new_bars.empty:
+            new_bars = new_bars[new_bars.index.as_unit('ns').asi8 > last]
+        self.aggregator.update(new_bars)
+        self.end_date = end_date
@@ -0,0 +1,59 @@
+import numpy as np
+from ..backtesting.vectorized import BUY_FRACTION, SELL_FRACTION
+
+
+class PaperBroker:
+    # Simulated fills using the Backtester rules: 80% sizing, stop-loss/take-profit checked against the close
+    def __init__(self, initial_capital, symbol="BTC-USD", initial_position=0, stop_loss_pct=0.05, take_profit_pct=0.1):
+        self.initial_capital = initial_capital
+        self.current_capital = initial_capital
+        self.symbol = symbol
+        self.asset = symbol.split('-')[0]
+        self.position = initial_position
+        self.stop_loss_pct = stop_loss_pct
+        self.take_profit_pct = take_profit_pct
+        self.entry_price = None
+        self.last_price = np.nan
+        self.fills = []
+
+    @property
+    def portfolio_value(self):
+        return self.current_capital + self.position * self.last_price
+
+    def on_bar(self, bar, signal):
+        price = bar['close']
+        self.last_price = price
+        reason = 'signal'
+
+        if self.entry_price is not None and signal != 1:
+            if price <= self.entry_price * (1 - self.stop_loss_pct):
+                signal, reason = -1, 'stop_loss'
+            elif price >= self.entry_price * (1 + self.take_profit_pct):
+                signal, reason = -1, 'take_profit'
+
+        if signal == 1:
+            buy_amount = min(self.current_capital, self.initial_capital * BUY_FRACTION)
+            if buy_amount > 0:
+                quantity = buy_amount / price
+                self.position = self.position + quantity
+                self.current_capital -= buy_amount
+                self.entry_price = price
+                self._record(bar, 'buy', price, quantity, reason)
+        elif signal == -1:
+            sell_quantity = min(self.position, self.position * SELL_FRACTION)
+            if sell_quantity > 0:
+                self.position -= sell_quantity
+                self.current_capital += sell_quantity * price
+                self.entry_price = None
+                self._record(bar, 'sell', price, sell_quantity, reason)
+
+        return self.portfolio_value
+
+    def _record(self, bar, side, price, quantity, reason):
+        self.fills.append({
+            'timestamp': bar.get('timestamp'),
+            'side': side,
+            'price': price,
+            'quantity': quantity,
+            'reason': reason
+        })
@@ -0,0 +1,83 @@
+import asyncio
+import time
+from array import array
+
+import numpy as np
+from ..backtesting.metrics import MetricsAccumulator
+from ..backtesting.results import ResultsBuffer
+from ..utils.instrumentation import profile_run
+from .broker import PaperBroker
+from .feeds import ReplayFeed
+
+
+class TradingEngine:
+    # Feeds each incoming bar through strategy.update() and the broker, timing bar-to-decision latency
+    def __init__(self, strategy, feed, broker):
+        self.strategy = strategy
+        self.feed = feed
+        self.broker = broker
+        self.latencies_ns = array('q')
+        self.metrics = MetricsAccumulator(broker.initial_capital)
+        self.records = ResultsBuffer(broker.asset)
+
+    async def run(self, max_bars=None, profiler=None, report_path=None):
+        name = f"{self.strategy.__class__.__name__}_{self.broker.symbol}_live"
+        with profile_run(name, profiler=profiler, report_path=report_path) as run:
+            await self._run(run, max_bars)
+            run.extra['latency'] = self.latency_stats()
+        self.report = run.report()
+        return self.results()
+
+    async def _run(self, run, max_bars):
+        self.strategy.reset()
+        bars_seen = 0
+
+        signal_ns = execution_ns = 0
+        try:
+            async for bar in self.feed:
+                started = time.perf_counter_ns()
+                bars_seen += 1
+                signal = self.strategy.update(bar)
+                signalled = time.perf_counter_ns()
+                support, resistance = np.nan, np.nan
+                if isinstance(signal, tuple):
+                    signal, support, resistance = signal
+                if bars_seen < self.strategy.long_window:
+                    signal, support, resistance = 0, np.nan, np.nan
+                portfolio_value = self.broker.on_bar(bar, signal)
+                finished = time.perf_counter_ns()
+                signal_ns += signalled - started
+                execution_ns += finished - signalled
+                self.latencies_ns.append(finished - started)
+                run.count('bars')
+                self.metrics.update(portfolio_value)
+
+                self.records.append(bar.get('timestamp'), portfolio_value, bar['close'], self.broker.position,
+                                    support, resistance)
+                if max_bars is not None and bars_seen >= max_bars:
+                    break
+        finally:
+            run.add_stage('signals', signal_ns / 1e9, bars_seen)
+            run.add_stage('execution', execution_ns / 1e9, bars_seen)
+
+    def results(self):
+        return self.records.frame()
+
+    def latency_stats(self):
+        if not self.latencies_ns:
+            return {}
+        latencies_us = np.frombuffer(self.latencies_ns, dtype=np.int64) / 1000
+        return {
+            'bars': len(latencies_us),
+            'mean_us': float(latencies_us.mean()),
+            'p50_us': float(np.percentile(latencies_us, 50)),
+            'p99_us': float(np.percentile(latencies_us, 99)),
+            'max_us': float(latencies_us.max())
+        }
+
+
+def run_paper_replay(strategy, data, initial_capital, symbol="BTC-USD", speed=None, **broker_kwargs):
+    broker = PaperBroker(initial_capital, symbol=symbol, **broker_kwargs)
+    engine = TradingEngine(strategy, ReplayFeed(data, speed=speed), broker)
+    asyncio.run(engine.run())
+    return engine
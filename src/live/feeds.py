@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pandas as pd
+from ..data_collection.async_fetcher import AsyncCandleFetcher
+from ..data_processing.bars import iter_bars
+
+
+class ReplayFeed:
+    # Plays stored candles back as a stream. speed=None replays as fast as possible;
+    # otherwise candle spacing is divided by speed (speed=60 plays one-minute candles once a second).
+    def __init__(self, data, speed=None):
+        self.data = data
+        self.speed = speed
+
+    async def __aiter__(self):
+        started = time.monotonic()
+        first = self.data.index[0] if len(self.data) else None
+
+        for bar in iter_bars(self.data):
+            if self.speed:
+                due = started + (bar.timestamp - first).total_seconds() / self.speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield bar
+
+
+class QueueFeed:
+    # Adapter for push-based sources (websocket handlers, tests): put bar dicts in, None ends the stream
+    def __init__(self, maxsize=0):
+        self.queue = asyncio.Queue(maxsize)
+
+    async def put(self, bar):
+        await self.queue.put(bar)
+
+    async def close(self):
+        await self.queue.put(None)
+
+    async def __aiter__(self):
+        while True:
+            bar = await self.queue.get()
+            if bar is None:
+                return
+            yield bar
+
+
+class PollingCandleFeed:
+    # Polls the candles endpoint and yields each candle once it has closed
+    def __init__(self, symbol, granularity=60, fetcher=None, lookback=1):
+        self.symbol = symbol
+        self.granularity = granularity
+        self.fetcher = fetcher or AsyncCandleFetcher(max_concurrency=1)
+        self.lookback = lookback
+        self._last_timestamp = None
+
+    async def __aiter__(self):
+        step = pd.Timedelta(seconds=self.granularity)
+        while True:
+            now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+            last_closed = now.floor(step) - step
+            start = self._last_timestamp + step if self._last_timestamp is not None else last_closed - step * (self.lookback - 1)
+            if start <= last_closed:
+                frames = await self.fetcher.fetch_many([self.symbol], start, last_closed, self.granularity)
+                candles = frames[self.symbol]
+                for bar in iter_bars(candles):
+                    if self._last_timestamp is not None and bar.timestamp <= self._last_timestamp:
+                        continue
+                    self._last_timestamp = bar.timestamp
+                    yield bar
+            next_close = now.floor(step) + step
+            await asyncio.sleep(max((next_close - pd.Timestamp.now(tz='UTC').tz_localize(None)).total_seconds(), 0) + 1)
@@ -0,0 +1,185 @@
+import itertools
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from ..backtesting.backtester import Backtester
+from ..data_collection.exchange_data import get_historical_data
+from ..data_processing.processor import OHLCV_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+class SharedOHLCV:
+    # Publishes an OHLCV frame in one shared-memory block so worker processes map it instead of unpickling a copy
+    def __init__(self, data):
+        values = np.ascontiguousarray(data[OHLCV_COLUMNS].to_numpy(dtype=np.float64))
+        # Shared as naive UTC nanoseconds whatever the unit; the timezone travels in the spec
+        timestamps = pd.DatetimeIndex(data.index)
+        self.tz = timestamps.tz
+        self.index_name = timestamps.name
+        if self.tz is not None:
+            timestamps = timestamps.tz_convert(None)
+        index = np.ascontiguousarray(timestamps.as_unit('ns').asi8)
+        self.n_rows = len(data)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes + index.nbytes, 1))
+        shared_index, shared_values = _views(self._shm, self.n_rows)
+        shared_index[:] = index
+        shared_values[:] = values
+
+    @property
+    def spec(self):
+        return self._shm.name, self.n_rows, self.tz, self.index_name
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SharedArray:
+    # A single ndarray in shared memory; workers rebuild it from `spec` without copying
+    def __init__(self, array):
+        array = np.ascontiguousarray(array)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.spec = (self._shm.name, array.shape, array.dtype.str)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=self._shm.buf)[...] = array
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_shared_array(spec):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _views(shm, n_rows):
+    index = np.ndarray((n_rows,), dtype=np.int64, buffer=shm.buf)
+    values = np.ndarray((n_rows, len(OHLCV_COLUMNS)), dtype=np.float64, buffer=shm.buf, offset=index.nbytes)
+    return index, values
+
+
+def attach_shared_ohlcv(spec):
+    name, n_rows, tz, index_name = spec
+    shm = shared_memory.SharedMemory(name=name)
+    index, values = _views(shm, n_rows)
+    timestamps = pd.DatetimeIndex(index.view('datetime64[ns]'), name=index_name)
+    if tz is not None:
+        timestamps = timestamps.tz_localize('UTC').tz_convert(tz)
+    data = pd.DataFrame(values, index=timestamps, columns=OHLCV_COLUMNS, copy=False)
+    return shm, data
+
+
+_worker_shm = None
+_worker_data = None
+
+
+def _init_worker(spec):
+    global _worker_shm, _worker_data
+    _worker_shm, _worker_data = attach_shared_ohlcv(spec)
+
+
+def evaluate(strategy_class, params, data, initial_capital, symbol):
+    strategy = strategy_class(**params)
+    backtester = Backtester(strategy, start_date=data.index[0], end_date=data.index[-1],
+                            initial_capital=initial_capital, symbol=symbol)
+    results = backtester.backtest(data)
+    return {**params, **backtester.calculate_metrics(results)}
+
+
+def _evaluate_in_worker(task):
+    strategy_class, params, initial_capital, symbol = task
+    return evaluate(strategy_class, params, _worker_data, initial_capital, symbol)
+
+
+class ParameterOptimizer:
+    def __init__(self, strategy_class, symbol, start_date, end_date, initial_capital=1000,
+                 metric='sharpe_ratio', max_workers=None, data=None):
+        self.strategy_class = strategy_class
+        self.symbol = symbol
+        self.start_date = start_date
+        self.end_date = end_date
+        self.initial_capital = initial_capital
+        self.metric = metric
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.data = data
+
+    def load_data(self):
+        if self.data is None:
+            self.data = get_historical_data(self.symbol, self.start_date, self.end_date)
+        return self.data
+
+    @staticmethod
+    def grid(param_grid, constraint=None):
+        keys = list(param_grid)
+        combinations = (dict(zip(keys, values)) for values in itertools.product(*param_grid.values()))
+        return [params for params in combinations if constraint is None or constraint(params)]
+
+    @staticmethod
+    def sample(param_distributions, n_iter, seed=None, constraint=None, max_attempts=None):
+        # Each distribution is either a sequence to pick from or a callable taking a random.Random
+        rng = random.Random(seed)
+        max_attempts = max_attempts or n_iter * 100
+        seen, combinations = set(), []
+        for _ in range(max_attempts):
+            if len(combinations) == n_iter:
+                break
+            params = {key: dist(rng) if callable(dist) else rng.choice(list(dist))
+                      for key, dist in param_distributions.items()}
+            key = tuple(sorted(params.items()))
+            if key in seen or (constraint is not None and not constraint(params)):
+                continue
+            seen.add(key)
+            combinations.append(params)
+        return combinations
+
+    def grid_search(self, param_grid, constraint=None):
+        return self.run(self.grid(param_grid, constraint))
+
+    def random_search(self, param_distributions, n_iter, seed=None, constraint=None):
+        return self.run(self.sample(param_distributions, n_iter, seed, constraint))
+
+    def run(self, combinations, chunksize=None):
+        data = self.load_data()
+        if data.empty or not combinations:
+            logger.warning("Nothing to optimize: no data or no parameter combinations.")
+            return pd.DataFrame()
+
+        workers = min(self.max_workers, len(combinations))
+        if workers <= 1:
+            rows = [evaluate(self.strategy_class, params, data, self.initial_capital, self.symbol)
+                    for params in combinations]
+        else:
+            tasks = [(self.strategy_class, params, self.initial_capital, self.symbol) for params in combinations]
+            chunksize = chunksize or max(1, len(tasks) // (workers * 4))
+            with SharedOHLCV(data) as shared:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                         initargs=(shared.spec,)) as pool:
+                    rows = list(pool.map(_evaluate_in_worker, tasks, chunksize=chunksize))
+
+        return self.rank(pd.DataFrame(rows))
+
+    def rank(self, table):
+        table = table.sort_values(self.metric, ascending=False, na_position='last', kind='stable')
+        table = table.reset_index(drop=True)
+        table.index = table.index + 1
+        table.index.name = 'rank'
+        return table
@@ -0,0 +1,176 @@
+import logging
+import os
+import secrets
+import socket
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener, answer_challenge, deliver_challenge
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = os.environ.get('BACKTEST_WORKER_HOST', 'localhost')
+DEFAULT_PORT = int(os.environ.get('BACKTEST_WORKER_PORT', 6001))
+AUTHKEY_FILE = os.environ.get(
+    'BACKTEST_WORKER_AUTHKEY_FILE', os.path.join(os.path.expanduser('~'), '.config', 'trading_bot', 'worker_authkey')
+)
+REQUEST_TIMEOUT = float(os.environ.get('BACKTEST_WORKER_REQUEST_TIMEOUT', 10))
+
+
+def load_authkey(create=False, path=AUTHKEY_FILE):
+    """The worker's shared secret.
+
+    Connections exchange pickles, so anyone holding the key can run code in the worker. It comes
+    from BACKTEST_WORKER_AUTHKEY, or else from a random key in an owner-only (0600) file that
+    serve() creates and submit()/worker_stats()/shutdown() read.
+    """
+    key = os.environ.get('BACKTEST_WORKER_AUTHKEY')
+    if key:
+        return key.encode()
+    if create and not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass  # another worker created it first
+        else:
+            with os.fdopen(fd, 'w') as f:
+                f.write(secrets.token_hex(32))
+    try:
+        with open(path) as f:
+            key = f.read().strip()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"No worker authkey at {path}; start the worker with 'python main.py serve' "
+                                f"or set BACKTEST_WORKER_AUTHKEY") from None
+    if os.stat(path).st_mode & 0o077:
+        raise PermissionError(f"{path} is readable by other users; restrict it with: chmod 600 {path}")
+    return key.encode()
+
+
+def serve(address=(DEFAULT_HOST, DEFAULT_PORT), authkey=None, worker=None, timeout=REQUEST_TIMEOUT):
+    """Run backtest jobs sent by submit() until a shutdown request arrives.
+
+    Requests are handled one at a time by a single BacktestWorker, so its candle and indicator
+    caches stay warm across jobs and clients. Each client authenticates and sends its request in
+    its own thread and is dropped after `timeout` seconds, so a slow or silent one holds up nobody.
+    """
+    from .worker import BacktestWorker
+    authkey = authkey or load_authkey(create=True)
+    worker = worker if worker is not None else BacktestWorker()
+    busy = threading.Lock()
+    stopping = threading.Event()
+    # No authkey on the Listener: its accept() would run the challenge here, with no deadline. The default
+    # backlog of 1 drops connections that arrive together, and their clients only retry a second later
+    with Listener(address, backlog=socket.SOMAXCONN) as listener:
+        logger.info("Backtest worker %d listening on %s:%s", os.getpid(), *listener.address)
+        while True:
+            try:
+                connection = listener.accept()
+            except OSError as e:
+                logger.warning("Could not accept a connection: %s", e)
+                continue
+            if stopping.is_set():
+                connection.close()
+                break
+            threading.Thread(target=_session, daemon=True,
+                             args=(connection, authkey, timeout, worker, busy, stopping, listener.address)).start()
+    logger.info("Backtest worker %d stopped after %d jobs", os.getpid(), worker.jobs_run)
+
+
+def _session(connection, authkey, timeout, worker, busy, stopping, address):
+    # One client connection. Nothing a client sends or does may stop the worker; only a shutdown request does
+    with connection:
+        try:
+            request = _receive(connection, authkey, timeout)
+        except AuthenticationError:
+            logger.warning("Rejected a connection with the wrong authkey")
+            return
+        except (EOFError, OSError) as e:
+            logger.warning("Client disconnected or timed out before sending a request: %s", e)
+            return
+        except Exception as e:
+            # The pickle itself could not be loaded (e.g. a class the worker doesn't have)
+            reply = {'error': f"Unreadable request: {type(e).__name__}: {e}"}
+        else:
+            with busy:
+                if stopping.is_set():
+                    reply = {'error': "The worker is shutting down"}
+                else:
+                    try:
+                        reply, stop = _handle(worker, request)
+                    except Exception as e:
+                        logger.exception("Request failed")
+                        reply, stop = {'error': f"{type(e).__name__}: {e}"}, False
+                    if stop:
+                        stopping.set()
+        try:
+            connection.send(reply)
+        except Exception as e:
+            # The client went away, or the reply couldn't be pickled
+            logger.warning("Could not send the reply: %s", e)
+    if stopping.is_set():
+        # Wake the accept() in serve() so it sees the flag
+        try:
+            socket.create_connection(address).close()
+        except OSError:
+            pass
+
+
+def _receive(connection, authkey, timeout):
+    # Authenticate the client and read its request, hanging up on it after `timeout` seconds
+    watchdog = threading.Timer(timeout, _hang_up, (connection,))
+    watchdog.start()
+    try:
+        deliver_challenge(connection, authkey)
+        answer_challenge(connection, authkey)
+        return connection.recv()
+    finally:
+        watchdog.cancel()
+        watchdog.join()
+
+
+def _hang_up(connection):
+    # shutdown() wakes the read blocked on the socket in the serving thread (close() would not)
+    try:
+        with socket.fromfd(connection.fileno(), socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+def _handle(worker, request):
+    # (reply, stop) for one request; malformed requests get an {'error': ...} reply
+    if not isinstance(request, dict):
+        return {'error': f"Expected a dict request, got {type(request).__name__}"}, False
+    command = request.get('command', 'run')
+    if command == 'run':
+        jobs = request.get('jobs')
+        if not isinstance(jobs, (list, tuple)) or not all(isinstance(job, dict) for job in jobs):
+            return {'error': "A 'run' request needs a 'jobs' list of job dicts"}, False
+        return worker.run_many(jobs, return_results=bool(request.get('return_results', False))), False
+    if command == 'stats':
+        return worker.stats(), False
+    if command == 'shutdown':
+        return worker.stats(), True
+    return {'error': f"Unknown command {command!r}"}, False
+
+
+def request(message, address=(DEFAULT_HOST, DEFAULT_PORT), authkey=None):
+    with Client(address, authkey=authkey or load_authkey()) as connection:
+        connection.send(message)
+        reply = connection.recv()
+    if isinstance(reply, dict) and set(reply) == {'error'}:
+        raise RuntimeError(f"Worker rejected the request: {reply['error']}")
+    return reply
+
+
+def submit(jobs, address=(DEFAULT_HOST, DEFAULT_PORT), authkey=None, return_results=False):
+    # Job summaries in submission order; results frames are only sent back when asked for
+    return request({'command': 'run', 'jobs': list(jobs), 'return_results': return_results}, address, authkey)
+
+
+def worker_stats(address=(DEFAULT_HOST, DEFAULT_PORT), authkey=None):
+    return request({'command': 'stats'}, address, authkey)
+
+
+def shutdown(address=(DEFAULT_HOST, DEFAULT_PORT), authkey=None):
+    return request({'command': 'shutdown'}, address, authkey)
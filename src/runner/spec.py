@@ -0,0 +1,93 @@
+import importlib
+import json
+import os
+from datetime import datetime, timedelta
+
+# Same as utils.database.DAILY_GRANULARITY, repeated so parsing the command line doesn't import pymongo
+DAILY_GRANULARITY = 86400
+
+# Short name -> (module, class, default params); modules are imported on first use (RSIStrategy pulls in ta)
+STRATEGIES = {
+    'sma': ('..strategy.simple_moving_average', 'SMACrossoverStrategy', {'short_window': 5, 'long_window': 10}),
+    'rsi': ('..strategy.rsi_strategy', 'RSIStrategy', {}),
+}
+DEFAULT_JOB = {
+    'name': None,
+    'strategy': 'sma',
+    'params': None,
+    'symbol': 'SOL-USD',
+    'start': None,
+    'end': None,
+    'days': 60,
+    'granularity': DAILY_GRANULARITY,
+    'initial_capital': 1000,
+    'initial_position': 0,
+    'dtype': 'float64',
+    'vectorized': True,
+    'save': True,
+    'output_dir': None,
+    'formats': ['png'],
+    'profile': None,
+    'report_path': None,
+    'report_dir': None,
+}
+
+
+def _strategy_entry(name):
+    for key, entry in STRATEGIES.items():
+        if name in (key, entry[1]):
+            return entry
+    raise ValueError(f"Unknown strategy {name!r}; expected one of {', '.join(STRATEGIES)}")
+
+
+def strategy_class(name):
+    module, class_name, _ = _strategy_entry(name)
+    return getattr(importlib.import_module(module, __package__), class_name)
+
+
+def normalize_job(job):
+    # Job dict with defaults filled in, params merged over the strategy's defaults and start/end resolved
+    unknown = set(job) - set(DEFAULT_JOB)
+    if unknown:
+        raise ValueError(f"Unknown job field(s): {', '.join(sorted(unknown))}")
+    job = {**DEFAULT_JOB, **job}
+    job['params'] = {**_strategy_entry(job['strategy'])[2], **(job['params'] or {})}
+    job['end'] = job['end'] or datetime.now().strftime("%Y-%m-%d")
+    if not job['start']:
+        start = datetime.strptime(job['end'][:10], "%Y-%m-%d") - timedelta(days=job['days'])
+        job['start'] = start.strftime("%Y-%m-%d")
+    if job['name'] is None:
+        params = '_'.join(f"{key}{value}" for key, value in job['params'].items())
+        job['name'] = '_'.join(part for part in (job['strategy'], job['symbol'], params) if part)
+    if job['report_dir'] and not job['report_path']:
+        job['report_path'] = os.path.join(job['report_dir'], f"{job['name']}.json")
+    return job
+
+
+def expand_jobs(jobs, defaults=None):
+    # One job per symbol for entries that give a 'symbols' list
+    expanded = []
+    for job in jobs:
+        job = {**(defaults or {}), **job}
+        symbols = job.pop('symbols', None)
+        if symbols is None:
+            expanded.append(job)
+        else:
+            expanded.extend({**job, 'symbol': symbol} for symbol in symbols)
+    return expanded
+
+
+def load_jobs(path):
+    """Jobs from a batch file.
+
+    Either JSON lines (one job per line), a JSON list of jobs, or an object
+    {"defaults": {...}, "jobs": [...]} whose defaults apply to every job.
+    """
+    with open(path) as f:
+        text = f.read()
+    if path.endswith('.jsonl'):
+        return expand_jobs(json.loads(line) for line in text.splitlines() if line.strip())
+    spec = json.loads(text)
+    if isinstance(spec, dict):
+        return expand_jobs(spec.get('jobs', []), spec.get('defaults'))
+    return expand_jobs(spec)
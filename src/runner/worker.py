@@ -0,0 +1,110 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+from ..backtesting.backtester import Backtester
+from ..data_collection.exchange_data import DAILY_GRANULARITY, get_historical_data
+from ..strategy.indicator_cache import IndicatorCache
+from .spec import normalize_job, strategy_class
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_FRAMES = 32
+
+
+class BacktestWorker:
+    """Runs backtest jobs in one process, keeping loaded candles and indicators between jobs.
+
+    Candles are kept per (symbol, granularity, start, end) in a small LRU, and the same frame
+    object is handed to every job on that range, so the indicator cache recognises it without
+    re-hashing. A long-lived worker (see server.serve) pays imports, Mongo connection setup and
+    data loading once; later jobs on the same data only run the signals and the simulation.
+    """
+
+    def __init__(self, max_frames=DEFAULT_MAX_FRAMES, indicator_cache=None):
+        self.max_frames = max_frames
+        self.indicator_cache = indicator_cache if indicator_cache is not None else IndicatorCache()
+        self.frames = OrderedDict()
+        self.frame_hits = 0
+        self.frame_misses = 0
+        self.jobs_run = 0
+
+    def load(self, symbol, start, end, granularity=DAILY_GRANULARITY):
+        key = (symbol, granularity, start, end)
+        data = self.frames.get(key)
+        if data is not None:
+            self.frames.move_to_end(key)
+            self.frame_hits += 1
+            return data
+        self.frame_misses += 1
+        data = get_historical_data(symbol, start, end, granularity)
+        if not data.empty:
+            self.frames[key] = data
+            while len(self.frames) > self.max_frames:
+                self.frames.popitem(last=False)
+        return data
+
+    def run(self, job, return_results=False):
+        # Summary dict of one job: metrics, trade stats, timings and any rendered report files
+        job = normalize_job(job)
+        started = time.perf_counter()
+        backtester = Backtester(
+            strategy_class(job['strategy'])(**job['params']), job['start'], job['end'], job['initial_capital'],
+            symbol=job['symbol'], initial_position=job['initial_position'],
+            indicator_cache=self.indicator_cache, dtype=np.dtype(job['dtype'])
+        )
+        data = self.load(job['symbol'], job['start'], job['end'], job['granularity'])
+        loaded = time.perf_counter()
+        if job['report_path']:
+            os.makedirs(os.path.dirname(os.path.abspath(job['report_path'])), exist_ok=True)
+        results = backtester.run(vectorized=job['vectorized'], profiler=job['profile'],
+                                 report_path=job['report_path'], data=data, persist=job['save'])
+        self.jobs_run += 1
+
+        summary = {
+            'name': job['name'],
+            'strategy': type(backtester.strategy).__name__,
+            'params': job['params'],
+            'symbol': job['symbol'],
+            'start': job['start'],
+            'end': job['end'],
+            'bars': len(results),
+            'metrics': backtester.metrics,
+            'trade_stats': backtester.accumulator.trade_stats() if backtester.accumulator else {},
+            'load_seconds': loaded - started,
+            'seconds': time.perf_counter() - started,
+            'report': backtester.report,
+            'files': [],
+        }
+        if job['output_dir'] and not results.empty:
+            # Plotting (and matplotlib) only for jobs that ask for files
+            from ..visualization.report import render_report
+            summary['files'] = render_report(results, backtester.asset, job['output_dir'], name=job['name'],
+                                             formats=tuple(job['formats']), metrics=backtester.metrics)
+        if return_results:
+            summary['results'] = results
+        return summary
+
+    def run_many(self, jobs, return_results=False):
+        # A failing job is reported in its summary ('error') instead of stopping the batch
+        summaries = []
+        for job in jobs:
+            try:
+                summaries.append(self.run(job, return_results=return_results))
+            except Exception as e:
+                logger.exception("Job %s failed", job.get('name') or job)
+                summaries.append({'name': job.get('name'), 'strategy': job.get('strategy'), 'symbol': job.get('symbol'),
+                                  'error': f"{type(e).__name__}: {e}"})
+        return summaries
+
+    def stats(self):
+        return {
+            'pid': os.getpid(),
+            'jobs_run': self.jobs_run,
+            'frames': len(self.frames),
+            'frame_hits': self.frame_hits,
+            'frame_misses': self.frame_misses,
+            'indicator_cache': self.indicator_cache.stats(),
+        }
@@ -0,0 +1,208 @@
+import hashlib
+import os
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from ..utils.instrumentation import count, stage
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+INDICATORS = {}
+
+
+def indicator(name):
+    # Register fn(cache, data, **params) -> array or tuple of arrays under name
+    def register(fn):
+        INDICATORS[name] = fn
+        return fn
+    return register
+
+
+def _digest_values(digest, values):
+    values = np.ascontiguousarray(values)
+    digest.update(values.dtype.str.encode())
+    digest.update(values.view(np.uint8) if values.dtype.kind in 'biufmM' else repr(values.tolist()).encode())
+
+
+def fingerprint(data):
+    # Content hash of the frame: index, column labels and every column's values
+    digest = hashlib.blake2b(digest_size=16)
+    _digest_values(digest, data.index.to_numpy())
+    digest.update(repr(list(data.columns)).encode())
+    for column in data.columns:
+        _digest_values(digest, data[column].to_numpy())
+    return digest.hexdigest()
+
+
+def _read_only(value):
+    if isinstance(value, tuple):
+        return tuple(_read_only(item) for item in value)
+    value = np.asarray(value)
+    value.setflags(write=False)
+    return value
+
+
+def _nbytes(value):
+    return sum(item.nbytes for item in value) if isinstance(value, tuple) else value.nbytes
+
+
+class IndicatorCache:
+    """LRU store of indicator series keyed by (indicator, params, data fingerprint).
+
+    Values are read-only NumPy arrays shared between every strategy that asks for the same
+    series. Entries are evicted least-recently-used first once max_entries or max_bytes is
+    exceeded. Frames are treated as immutable: their fingerprint is computed once per object.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._fingerprints = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def fingerprint(self, data):
+        known = self._fingerprints.get(id(data))
+        if known is not None and known[0]() is data:
+            return known[1]
+        value = fingerprint(data)
+        key = id(data)
+        self._fingerprints[key] = (weakref.ref(data, lambda _, key=key: self._fingerprints.pop(key, None)), value)
+        return value
+
+    def get(self, data, name, **params):
+        key = (name, tuple(sorted(params.items())), self.fingerprint(data))
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            count('indicator_cache_hits')
+            return value
+
+        self.misses += 1
+        count('indicator_cache_misses')
+        with stage('indicators'):
+            value = _read_only(INDICATORS[name](self, data, **params))
+        size = _nbytes(value)
+        if size <= self.max_bytes:
+            self._entries[key] = value
+            self.nbytes += size
+            self._evict()
+        return value
+
+    def warm(self, data, requirements):
+        # Compute each unique (name, params) once up front, e.g. for every strategy in a parameter grid
+        for name, params in requirements:
+            self.get(data, name, **params)
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self.nbytes > self.max_bytes):
+            _, value = self._entries.popitem(last=False)
+            self.nbytes -= _nbytes(value)
+            self.evictions += 1
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self.nbytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate
+        }
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+
+_process_caches = {}
+
+
+def default_cache():
+    # One cache per process, so optimizer and walk-forward workers each keep their own
+    pid = os.getpid()
+    if pid not in _process_caches:
+        _process_caches.clear()
+        _process_caches[pid] = IndicatorCache()
+    return _process_caches[pid]
+
+
+def _candle_dtype(values):
+    # Indicators are cached in the candle dtype, so float32 candles give float32 series
+    dtypes = values.dtypes if isinstance(values, pd.DataFrame) else [values.dtype]
+    return np.result_type(np.float32, *dtypes)
+
+
+@indicator('sma')
+def _sma(cache, data, column='close', window=20, min_periods=None):
+    values = data[column]
+    return values.rolling(window=window, min_periods=min_periods).mean().to_numpy(dtype=_candle_dtype(values))
+
+
+@indicator('rolling_std')
+def _rolling_std(cache, data, column='close', window=20, min_periods=None, ddof=1):
+    values = data[column]
+    rolling = values.rolling(window=window, min_periods=min_periods)
+    return rolling.std(ddof=ddof).to_numpy(dtype=_candle_dtype(values))
+
+
+@indicator('rolling_max')
+def _rolling_max(cache, data, column='high', window=20):
+    values = data[column]
+    return values.rolling(window=window).max().to_numpy(dtype=_candle_dtype(values))
+
+
+@indicator('rolling_min')
+def _rolling_min(cache, data, column='low', window=20):
+    values = data[column]
+    return values.rolling(window=window).min().to_numpy(dtype=_candle_dtype(values))
+
+
+@indicator('ema')
+def _ema(cache, data, column='close', span=20, min_periods=0):
+    values = data[column]
+    return values.ewm(span=span, min_periods=min_periods, adjust=False).mean().to_numpy(dtype=_candle_dtype(values))
+
+
+@indicator('rsi')
+def _rsi(cache, data, column='close', period=14):
+    values = data[column]
+    close_delta = values.diff()
+    up = close_delta.clip(lower=0)
+    down = -1 * close_delta.clip(upper=0)
+    ma_up = up.ewm(com=period - 1, adjust=False).mean()
+    ma_down = down.ewm(com=period - 1, adjust=False).mean()
+    return (100 - (100 / (1 + ma_up / ma_down))).to_numpy(dtype=_candle_dtype(values))
+
+
+@indicator('macd')
+def _macd(cache, data, column='close', fast=12, slow=26, signal=9):
+    # (macd, signal line); the EMAs come from the cache so strategies sharing one span share the series
+    macd = cache.get(data, 'ema', column=column, span=fast, min_periods=fast) - \
+        cache.get(data, 'ema', column=column, span=slow, min_periods=slow)
+    frame = pd.Series if macd.ndim == 1 else pd.DataFrame
+    macd_signal = frame(macd).ewm(span=signal, min_periods=signal, adjust=False).mean().to_numpy(dtype=macd.dtype)
+    return macd, macd_signal
+
+
+@indicator('bollinger')
+def _bollinger(cache, data, column='close', window=20, num_std=2):
+    # (lower band, upper band)
+    mavg = cache.get(data, 'sma', column=column, window=window, min_periods=window)
+    mstd = cache.get(data, 'rolling_std', column=column, window=window, min_periods=window, ddof=0)
+    return mavg - num_std * mstd, mavg + num_std * mstd
@@ -0,0 +1,165 @@
+import math
+from collections import deque
+
+import numpy as np
+
+
+class EWM:
+    # Mirrors pandas' ewm(adjust=False).mean() one observation at a time
+    def __init__(self, com=None, span=None, alpha=None, min_periods=0):
+        if alpha is None:
+            if com is not None:
+                alpha = 1. / (1. + com)
+            elif span is not None:
+                alpha = 2. / (span + 1.)
+            else:
+                raise ValueError("One of com, span or alpha must be given")
+        self.alpha = alpha
+        self.min_periods = max(min_periods, 1)
+        self._old_wt = 1. - alpha
+        self.value = np.nan
+        self.nobs = 0
+
+    def update(self, x):
+        if x == x:
+            self.nobs += 1
+            if self.value != self.value:
+                self.value = x
+            elif self.value != x:
+                self.value = (self._old_wt * self.value + self.alpha * x) / (self._old_wt + self.alpha)
+        return self.current
+
+    @property
+    def current(self):
+        return self.value if self.nobs >= self.min_periods else np.nan
+
+
+class RollingWindow:
+    # Ring buffer replaying pandas' rolling mean/var updates (Kahan-compensated sum, Welford variance)
+    # so streamed values match rolling(window).mean()/.std() bar for bar
+    def __init__(self, window, min_periods=None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self._buffer = np.zeros(window)
+        self._head = 0
+        self.count = 0
+        self._started = False
+
+    def _reset(self, x):
+        self.nobs = 0
+        self._neg_ct = 0
+        self._same_ct = 0
+        self._prev_value = x
+        self._sum = 0.
+        self._sum_add_comp = 0.
+        self._sum_remove_comp = 0.
+        self._mean = 0.
+        self._ssqdm = 0.
+        self._var_add_comp = 0.
+        self._var_remove_comp = 0.
+
+    def _add(self, x):
+        self.nobs += 1
+        y = x - self._sum_add_comp
+        t = self._sum + y
+        self._sum_add_comp = t - self._sum - y
+        self._sum = t
+        if math.copysign(1., x) < 0:
+            self._neg_ct += 1
+        self._same_ct = self._same_ct + 1 if x == self._prev_value else 1
+        self._prev_value = x
+
+        prev_mean = self._mean - self._var_add_comp
+        y = x - self._var_add_comp
+        t = y - self._mean
+        self._var_add_comp = t + self._mean - y
+        self._mean += t / self.nobs
+        self._ssqdm += (x - prev_mean) * (x - self._mean)
+
+    def _remove(self, x):
+        self.nobs -= 1
+        y = -x - self._sum_remove_comp
+        t = self._sum + y
+        self._sum_remove_comp = t - self._sum - y
+        self._sum = t
+        if math.copysign(1., x) < 0:
+            self._neg_ct -= 1
+
+        if self.nobs:
+            prev_mean = self._mean - self._var_remove_comp
+            y = x - self._var_remove_comp
+            t = y - self._mean
+            self._var_remove_comp = t + self._mean - y
+            self._mean -= t / self.nobs
+            self._ssqdm -= (x - prev_mean) * (x - self._mean)
+        else:
+            self._mean = 0.
+            self._ssqdm = 0.
+
+    def update(self, x):
+        if not self._started or self.window == 1:
+            # pandas restarts the accumulators whenever consecutive windows don't overlap
+            self._reset(x)
+            self._started = True
+            self.count = 0
+        elif self.count == self.window:
+            self._remove(self._buffer[self._head])
+            self.count -= 1
+        self._buffer[self._head] = x
+        self._head = (self._head + 1) % self.window
+        self.count += 1
+        self._add(x)
+
+    def mean(self):
+        if not self._started or self.nobs < self.min_periods or self.nobs == 0:
+            return np.nan
+        if self._same_ct >= self.nobs:
+            return self._prev_value
+        result = self._sum / self.nobs
+        if self._neg_ct == 0 and result < 0:
+            return 0.
+        if self._neg_ct == self.nobs and result > 0:
+            return 0.
+        return result
+
+    def var(self, ddof=1):
+        if not self._started or self.nobs < self.min_periods or self.nobs <= ddof:
+            return np.nan
+        if self.nobs == 1 or self._same_ct >= self.nobs:
+            return 0.
+        result = self._ssqdm / (self.nobs - ddof)
+        return result if result > 0 else 0.
+
+    def std(self, ddof=1):
+        return math.sqrt(self.var(ddof))
+
+
+class RollingExtremum:
+    # Monotonic deque giving the max (or min) of the last `window` values in O(1) amortised
+    def __init__(self, window, mode='max'):
+        if mode not in ('max', 'min'):
+            raise ValueError("mode must be 'max' or 'min'")
+        self.window = window
+        self._is_max = mode == 'max'
+        self._deque = deque()
+        self._index = 0
+
+    def update(self, x):
+        dq = self._deque
+        if self._is_max:
+            while dq and dq[-1][1] <= x:
+                dq.pop()
+        else:
+            while dq and dq[-1][1] >= x:
+                dq.pop()
+        dq.append((self._index, x))
+        if dq[0][0] <= self._index - self.window:
+            dq.popleft()
+        self._index += 1
+        return self.current
+
+    @property
+    def current(self):
+        if self._index < self.window:
+            return np.nan
+        return self._deque[0][1]
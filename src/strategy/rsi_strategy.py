@@ -1,7 +1,12 @@
+import logging
 import pandas as pd
 import numpy as np
 from ta.trend import MACD
 from ta.volatility import BollingerBands
+from .indicators import EWM, RollingWindow, RollingExtremum
+from .indicator_cache import default_cache
+
+logger = logging.getLogger(__name__)
 
 class RSIStrategy:
     def __init__(self, rsi_period=14, overbought=70, oversold=30, support_resistance_periods=21,
@@ -15,6 +20,18 @@ class RSIStrategy:
         self.macd_signal = macd_signal
         self.bb_period = bb_period
         self.bb_std = bb_std
+        self.reset()
+
+    def reset(self):
+        self._last_close = np.nan
+        self._avg_gain = EWM(com=self.rsi_period - 1)
+        self._avg_loss = EWM(com=self.rsi_period - 1)
+        self._high_max = RollingExtremum(self.support_resistance_periods, mode='max')
+        self._low_min = RollingExtremum(self.support_resistance_periods, mode='min')
+        self._ema_fast = EWM(span=self.macd_fast, min_periods=self.macd_fast)
+        self._ema_slow = EWM(span=self.macd_slow, min_periods=self.macd_slow)
+        self._macd_signal = EWM(span=self.macd_signal, min_periods=self.macd_signal)
+        self._bb_window = RollingWindow(self.bb_period)
 
     def calculate_rsi(self, data):
         close_delta = data['close'].diff()
@@ -54,25 +71,97 @@ class RSIStrategy:
         latest_bb_lower = bb.bollinger_lband().iloc[-1]
         latest_bb_upper = bb.bollinger_hband().iloc[-1]
         
-        print(f"Latest RSI: {latest_rsi:.2f}, Close: {latest_close:.2f}, Support: {latest_support:.2f}, Resistance: {latest_resistance:.2f}")
-        print(f"MACD: {latest_macd:.2f}, Signal: {latest_macd_signal:.2f}, BB Lower: {latest_bb_lower:.2f}, BB Upper: {latest_bb_upper:.2f}")
+        logger.debug("Latest RSI: %.2f, Close: %.2f, Support: %.2f, Resistance: %.2f",
+                     latest_rsi, latest_close, latest_support, latest_resistance)
+        logger.debug("MACD: %.2f, Signal: %.2f, BB Lower: %.2f, BB Upper: %.2f",
+                     latest_macd, latest_macd_signal, latest_bb_lower, latest_bb_upper)
         
         signal = 0
         if (latest_rsi <= self.oversold and 
             latest_close <= latest_support and
             latest_macd > latest_macd_signal and 
             latest_close <= latest_bb_lower):
-            print("Buy Signal Generated")
+            logger.debug("Buy Signal Generated")
             signal = 1
         elif (latest_rsi >= self.overbought and 
               latest_close >= latest_resistance and
               latest_macd < latest_macd_signal and 
               latest_close >= latest_bb_upper):
-            print("Sell Signal Generated")
+            logger.debug("Sell Signal Generated")
             signal = -1
         
         return signal, latest_support, latest_resistance
 
+    def required_indicators(self):
+        return [
+            ('rsi', {'column': 'close', 'period': self.rsi_period}),
+            ('rolling_min', {'column': 'low', 'window': self.support_resistance_periods}),
+            ('rolling_max', {'column': 'high', 'window': self.support_resistance_periods}),
+            ('macd', {'column': 'close', 'fast': self.macd_fast, 'slow': self.macd_slow, 'signal': self.macd_signal}),
+            ('bollinger', {'column': 'close', 'window': self.bb_period, 'num_std': self.bb_std})
+        ]
+
+    def generate_signals(self, data, cache=None):
+        # Same indicators as calculate_indicators, served from the shared cache
+        cache = default_cache() if cache is None else cache
+        rsi, low_min, high_max, (macd_line, macd_signal), (bb_lower, bb_upper) = (
+            cache.get(data, name, **params) for name, params in self.required_indicators()
+        )
+        close = data['close'].to_numpy()
+        # Support/resistance use the window ending on the previous bar
+        support = np.concatenate([np.full(1, np.nan, low_min.dtype), low_min])[:-1]
+        resistance = np.concatenate([np.full(1, np.nan, high_max.dtype), high_max])[:-1]
+
+        buy = ((rsi <= self.oversold) & (close <= support) &
+               (macd_line > macd_signal) & (close <= bb_lower))
+        sell = ((rsi >= self.overbought) & (close >= resistance) &
+                (macd_line < macd_signal) & (close >= bb_upper))
+        signals = np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
+
+        return signals, support, resistance
+
+    def update(self, bar):
+        # Streaming counterpart of generate_signal: O(1) state per indicator instead of a full recompute
+        close, high, low = bar['close'], bar['high'], bar['low']
+
+        delta = close - self._last_close
+        self._last_close = close
+        ma_up = self._avg_gain.update(max(delta, 0.) if delta == delta else np.nan)
+        ma_down = self._avg_loss.update(-min(delta, 0.) if delta == delta else np.nan)
+        if ma_down == 0:
+            rsi = 100. if ma_up > 0 else np.nan
+        else:
+            rsi = 100 - (100 / (1 + ma_up / ma_down))
+
+        # Support/resistance come from the window before this bar (shift(1) in the batch version)
+        support = self._low_min.current
+        resistance = self._high_max.current
+        self._low_min.update(low)
+        self._high_max.update(high)
+
+        macd = self._ema_fast.update(close) - self._ema_slow.update(close)
+        macd_signal = self._macd_signal.update(macd)
+
+        self._bb_window.update(close)
+        bb_mavg = self._bb_window.mean()
+        bb_mstd = self._bb_window.std(ddof=0)
+        bb_upper = bb_mavg + self.bb_std * bb_mstd
+        bb_lower = bb_mavg - self.bb_std * bb_mstd
+
+        signal = 0
+        if (rsi <= self.oversold and
+            close <= support and
+            macd > macd_signal and
+            close <= bb_lower):
+            signal = 1
+        elif (rsi >= self.overbought and
+              close >= resistance and
+              macd < macd_signal and
+              close >= bb_upper):
+            signal = -1
+
+        return signal, support, resistance
+
     @property
     def long_window(self):
         return max(self.rsi_period, self.support_resistance_periods, self.macd_slow, self.bb_period)
\ No newline at end of file
@@ -1,10 +1,30 @@
 import pandas as pd
 import numpy as np
+from .indicators import RollingWindow
+from .indicator_cache import default_cache
 
 class SMACrossoverStrategy:
+    supports_panel = True  # generate_signals also accepts (field, symbol) column panels
+
     def __init__(self, short_window, long_window):
         self.short_window = short_window
         self._long_window = long_window  # Use an underscore to indicate it's a private attribute
+        self.reset()
+
+    def reset(self):
+        self._short_buffer = RollingWindow(self.short_window, min_periods=1)
+        self._long_buffer = RollingWindow(self._long_window, min_periods=1)
+        self._last_signal = np.nan
+
+    def update(self, bar):
+        # Streaming counterpart of generate_signal: feed one candle, get the latest position change
+        close = bar['close']
+        self._short_buffer.update(close)
+        self._long_buffer.update(close)
+        signal = 1.0 if self._short_buffer.mean() > self._long_buffer.mean() else 0.0
+        position = signal - self._last_signal
+        self._last_signal = signal
+        return position
 
     def generate_signal(self, data):
         signals = pd.DataFrame(index=data.index)
@@ -17,6 +37,21 @@ class SMACrossoverStrategy:
         signals['positions'] = signals['signal'].diff()
         return signals['positions'].iloc[-1]
 
+    def required_indicators(self):
+        return [
+            ('sma', {'column': 'close', 'window': self.short_window, 'min_periods': 1}),
+            ('sma', {'column': 'close', 'window': self._long_window, 'min_periods': 1})
+        ]
+
+    def generate_signals(self, data, cache=None):
+        # Rolling means are causal, so one pass over the whole series gives the same
+        # value at every bar as generate_signal does on the prefix ending there
+        cache = default_cache() if cache is None else cache
+        short_mavg, long_mavg = (cache.get(data, name, **params) for name, params in self.required_indicators())
+        # int8 +1/-1/0; the first bar compares two means of one close, so it never signals
+        signal = (short_mavg > long_mavg).astype(np.int8)
+        return np.diff(signal, axis=0, prepend=signal[:1])
+
     @property
     def long_window(self):
         return self._long_window
\ No newline at end of file
@@ -1,39 +1,217 @@
+import os
+import threading
+import zlib
+from datetime import datetime, timezone
+
+import numpy as np
 import pymongo
 import pandas as pd
-from pymongo import MongoClient
+from bson import Binary, ObjectId
+from pymongo import MongoClient, UpdateOne
+from ..data_processing.processor import OHLCV_COLUMNS
+from .instrumentation import RoundTripCounter
+
+DEFAULT_URI = os.environ.get('MONGODB_URI', 'mongodb://localhost:27017')
+DAILY_GRANULARITY = 86400
+BULK_BATCH_SIZE = 10000
+READ_BATCH_SIZE = 10000
+RESULTS_CHUNK_ROWS = 100000
+
+_clients = {}
+_indexed = set()
+_lock = threading.Lock()
+
+
+def get_client(uri=DEFAULT_URI):
+    # One pooled MongoClient per URI and process; clients must not be shared across fork()
+    key = (uri, os.getpid())
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = MongoClient(uri, event_listeners=[RoundTripCounter()])
+            _clients[key] = client
+    return client
+
+
+def close_clients():
+    with _lock:
+        for (_, pid), client in list(_clients.items()):
+            if pid == os.getpid():
+                client.close()
+        _clients.clear()
+        _indexed.clear()
+
 
 class Database:
-    def __init__(self):
-        self.client = MongoClient('localhost', 27017)
-        self.db = self.client['crypto_trading']
+    def __init__(self, uri=None, client=None, db_name='crypto_trading'):
+        self.client = client if client is not None else get_client(uri or DEFAULT_URI)
+        self.db = self.client[db_name]
+        self.candles = self.db['candles']
+        self.backtest_runs = self.db['backtest_runs']
+        self.backtest_chunks = self.db['backtest_chunks']
+        self._ensure_indexes()
+
+    def _ensure_indexes(self):
+        key = (id(self.client), self.db.name)
+        if key in _indexed:
+            return
+        self.candles.create_index(
+            [('symbol', pymongo.ASCENDING), ('granularity', pymongo.ASCENDING), ('timestamp', pymongo.ASCENDING)],
+            unique=True, name='symbol_granularity_timestamp'
+        )
+        self.backtest_runs.create_index([('strategy', pymongo.ASCENDING), ('created_at', pymongo.DESCENDING)],
+                                        name='strategy_created_at')
+        self.backtest_runs.create_index([('strategy', pymongo.ASCENDING), ('metrics.sharpe_ratio', pymongo.DESCENDING)],
+                                        name='strategy_sharpe_ratio')
+        self.backtest_chunks.create_index([('run_id', pymongo.ASCENDING), ('seq', pymongo.ASCENDING)],
+                                          unique=True, name='run_id_seq')
+        _indexed.add(key)
 
-    def insert_historical_data(self, symbol, data):
-        collection = self.db['historical_data']
-        records = data.reset_index().to_dict('records')
-        collection.insert_many(records)
+    def insert_historical_data(self, symbol, data, granularity=DAILY_GRANULARITY):
+        # Upserts keyed on (symbol, granularity, timestamp) make repeated fetches idempotent
+        timestamps = pd.DatetimeIndex(data.index).to_pydatetime()
+        values = data[OHLCV_COLUMNS].to_numpy(dtype=float).tolist()
+        operations = [
+            UpdateOne(
+                {'symbol': symbol, 'granularity': granularity, 'timestamp': timestamp},
+                {'$set': dict(zip(OHLCV_COLUMNS, row))},
+                upsert=True
+            )
+            for timestamp, row in zip(timestamps, values)
+        ]
+        for start in range(0, len(operations), BULK_BATCH_SIZE):
+            self.candles.bulk_write(operations[start:start + BULK_BATCH_SIZE], ordered=False)
 
-    def get_historical_data(self, symbol, start_date, end_date):
-        collection = self.db['historical_data']
+    def get_historical_arrays(self, symbol, start_date, end_date, granularity=DAILY_GRANULARITY):
         query = {
+            'symbol': symbol,
+            'granularity': granularity,
             'timestamp': {
-                '$gte': pd.Timestamp(start_date),
-                '$lte': pd.Timestamp(end_date)
+                '$gte': pd.Timestamp(start_date).to_pydatetime(),
+                '$lte': pd.Timestamp(end_date).to_pydatetime()
             }
         }
-        data = list(collection.find(query))
-        return pd.DataFrame(data)
+        projection = {'_id': 0, 'timestamp': 1, **{field: 1 for field in OHLCV_COLUMNS}}
+
+        n = self.candles.count_documents(query)
+        timestamps = np.empty(n, dtype='datetime64[ms]')
+        values = np.empty((n, len(OHLCV_COLUMNS)))
+        cursor = self.candles.find(query, projection, batch_size=READ_BATCH_SIZE).sort('timestamp', pymongo.ASCENDING)
+        count = 0
+        for doc in cursor:
+            if count == n:
+                # Rows inserted after count_documents; keep the snapshot we sized for
+                break
+            timestamps[count] = doc['timestamp']
+            values[count] = [doc[field] for field in OHLCV_COLUMNS]
+            count += 1
+        return timestamps[:count], values[:count]
+
+    def get_historical_data(self, symbol, start_date, end_date, granularity=DAILY_GRANULARITY):
+        timestamps, values = self.get_historical_arrays(symbol, start_date, end_date, granularity)
+        index = pd.DatetimeIndex(timestamps.astype('datetime64[ns]'), name='timestamp')
+        return pd.DataFrame(values, index=index, columns=OHLCV_COLUMNS, copy=False)
+
+    def delete_historical_data(self, symbol, granularity=None):
+        query = {'symbol': symbol}
+        if granularity is not None:
+            query['granularity'] = granularity
+        return self.candles.delete_many(query).deleted_count
 
-    def insert_backtest_results(self, strategy_name, results):
-        collection = self.db['backtest_results']
-        document = {
+    def insert_backtest_results(self, strategy_name, results, params=None, symbol=None, start_date=None,
+                                end_date=None, metrics=None):
+        # One small metadata document per run plus zlib-compressed column chunks, so long runs stay far
+        # below Mongo's 16 MB document limit and run queries never touch the series itself
+        run_id = ObjectId()
+        columns = {name: _encode_column(results[name]) for name in results.columns}
+        n_rows = len(results)
+        chunks = []
+        for seq, start in enumerate(range(0, max(n_rows, 1), RESULTS_CHUNK_ROWS)):
+            stop = min(start + RESULTS_CHUNK_ROWS, n_rows)
+            chunks.append({
+                'run_id': run_id,
+                'seq': seq,
+                'n_rows': stop - start,
+                'columns': {name: Binary(zlib.compress(values[start:stop].tobytes(), 1))
+                            for name, (_, values) in columns.items()}
+            })
+        if n_rows:
+            self.backtest_chunks.insert_many(chunks)
+
+        self.backtest_runs.insert_one({
+            '_id': run_id,
             'strategy': strategy_name,
-            'results': results.to_dict('records')
-        }
-        collection.insert_one(document)
+            'params': _to_bson_values(params or {}),
+            'symbol': symbol,
+            'start_date': str(start_date) if start_date is not None else None,
+            'end_date': str(end_date) if end_date is not None else None,
+            'metrics': _to_bson_values(metrics or {}),
+            'created_at': datetime.now(timezone.utc),
+            'n_rows': n_rows,
+            'n_chunks': len(chunks) if n_rows else 0,
+            'columns': [{'name': name, 'dtype': dtype} for name, (dtype, _) in columns.items()]
+        })
+        return run_id
+
+    def get_latest_run(self, strategy_name, symbol=None):
+        query = {'strategy': strategy_name}
+        if symbol is not None:
+            query['symbol'] = symbol
+        return self.backtest_runs.find_one(query, sort=[('created_at', pymongo.DESCENDING)])
+
+    def get_best_run(self, strategy_name, metric='sharpe_ratio'):
+        # NaN and None fail every numeric range match, so only comparable scores are ranked
+        return self.backtest_runs.find_one(
+            {'strategy': strategy_name, f'metrics.{metric}': {'$gte': float('-inf')}},
+            sort=[(f'metrics.{metric}', pymongo.DESCENDING)]
+        )
+
+    def list_runs(self, strategy_name=None, limit=20):
+        query = {} if strategy_name is None else {'strategy': strategy_name}
+        return list(self.backtest_runs.find(query, sort=[('created_at', pymongo.DESCENDING)], limit=limit))
+
+    def load_backtest_results(self, run):
+        if not isinstance(run, dict):
+            run = self.backtest_runs.find_one({'_id': run})
+            if run is None:
+                return pd.DataFrame()
+        parts = {column['name']: [] for column in run['columns']}
+        for chunk in self.backtest_chunks.find({'run_id': run['_id']}, sort=[('seq', pymongo.ASCENDING)]):
+            for name in parts:
+                parts[name].append(zlib.decompress(chunk['columns'][name]))
+        return pd.DataFrame({
+            column['name']: np.frombuffer(b''.join(parts[column['name']]), dtype=column['dtype'])
+            for column in run['columns']
+        })
 
     def get_backtest_results(self, strategy_name):
-        collection = self.db['backtest_results']
-        return collection.find_one({'strategy': strategy_name})
+        run = self.get_latest_run(strategy_name)
+        if run is None:
+            return None
+        run['results'] = self.load_backtest_results(run)
+        return run
+
+    def delete_backtest_run(self, run_id):
+        self.backtest_chunks.delete_many({'run_id': run_id})
+        return self.backtest_runs.delete_one({'_id': run_id}).deleted_count
 
     def close(self):
-        self.client.close()
\ No newline at end of file
+        # The client is pooled and shared across the process; use close_clients() at shutdown
+        pass
+
+
+def _encode_column(series):
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        series = series.dt.tz_convert(None)
+    values = series.to_numpy()
+    if values.dtype.kind == 'M':
+        values = values.astype('datetime64[ns]')
+    elif values.dtype.kind not in 'biuf':
+        raise ValueError(f"Column {series.name!r} has unsupported dtype {values.dtype} for columnar storage")
+    values = np.ascontiguousarray(values)
+    return values.dtype.str, values
+
+
+def _to_bson_values(mapping):
+    # numpy scalars (np.int64 in particular) are not BSON-encodable
+    return {key: value.item() if isinstance(value, np.generic) else value for key, value in mapping.items()}
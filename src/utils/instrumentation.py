@@ -0,0 +1,184 @@
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('data_load', 'indicators', 'signals', 'execution', 'metrics', 'persistence')
+PROFILERS = ('cprofile', 'pyinstrument')
+
+_current = contextvars.ContextVar('trading_bot_run', default=None)
+
+
+class RunProfile:
+    """Per-run stage timers and counters.
+
+    Stage times are exclusive: time spent in a nested stage (indicators computed while
+    generating signals, say) is charged to the inner stage only, so stages add up to the
+    instrumented part of the run.
+    """
+
+    def __init__(self, name, profiler=None):
+        if profiler is not None and profiler not in PROFILERS:
+            raise ValueError(f"profiler must be one of {PROFILERS}, got {profiler!r}")
+        self.name = name
+        self.profiler = profiler
+        self.started_at = None
+        self.elapsed = 0.
+        self.stages = {}
+        self.calls = {}
+        self.counters = {}
+        self.profile = None
+        self.extra = {}  # additional report fields, e.g. live latency percentiles
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        frame = [0.]  # time spent in nested stages
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - started
+            self.stages[name] = self.stages.get(name, 0.) + elapsed - frame[0]
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if self._stack:
+                self._stack[-1][0] += elapsed
+
+    def add_stage(self, name, seconds, calls=1):
+        # Time the caller measured itself. Per-bar loops sum perf_counter deltas and record them once here:
+        # entering a stage() context twice per bar costs more than the work it times
+        self.stages[name] = self.stages.get(name, 0.) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+        if self._stack:
+            self._stack[-1][0] += seconds
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self):
+        bars = self.counters.get('bars', 0)
+        simulated = self.stages.get('signals', 0.) + self.stages.get('indicators', 0.) + self.stages.get('execution', 0.)
+        report = {
+            'run': self.name,
+            'started_at': self.started_at,
+            'elapsed_seconds': self.elapsed,
+            'stages': {name: {'seconds': seconds, 'calls': self.calls[name]} for name, seconds in self.stages.items()},
+            'counters': dict(self.counters),
+            'bars_per_second': bars / simulated if bars and simulated else None,
+            'pid': os.getpid(),
+            **self.extra
+        }
+        if self.profile is not None:
+            report['profile'] = self.profile
+        return report
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2, default=str)
+
+
+_null_stage = nullcontext()
+
+
+class _NullRun:
+    # Stand-in when no run is active, so instrumented code never has to check; stage() is one shared no-op
+    def stage(self, name):
+        return _null_stage
+
+    def add_stage(self, name, seconds, calls=1):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+
+_null_run = _NullRun()
+
+
+def current_run():
+    run = _current.get()
+    return _null_run if run is None else run
+
+
+def stage(name):
+    return current_run().stage(name)
+
+
+def count(name, n=1):
+    current_run().count(name, n)
+
+
+@contextmanager
+def profile_run(name, profiler=None, report_path=None):
+    """Collect stage timers and counters for everything run inside the block.
+
+    profiler='cprofile' or 'pyinstrument' also captures a call profile into the report.
+    The report is logged at INFO and written as JSON when report_path is given.
+    """
+    run = RunProfile(name, profiler)
+    run.started_at = datetime.now(timezone.utc).isoformat()
+    token = _current.set(run)
+    capture = _start_profiler(profiler)
+    started = time.perf_counter()
+    try:
+        yield run
+    finally:
+        run.elapsed = time.perf_counter() - started
+        run.profile = _stop_profiler(profiler, capture)
+        _current.reset(token)
+        logger.info("%s finished in %.3fs: %s", name, run.elapsed,
+                    ', '.join(f"{stage_name}={seconds:.3f}s" for stage_name, seconds in run.stages.items()))
+        if report_path is not None:
+            run.write(report_path)
+
+
+def _start_profiler(profiler):
+    if profiler == 'cprofile':
+        capture = cProfile.Profile()
+        capture.enable()
+        return capture
+    if profiler == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ImportError("profiler='pyinstrument' needs the pyinstrument package (pip install pyinstrument)")
+        capture = Profiler()
+        capture.start()
+        return capture
+    return None
+
+
+def _stop_profiler(profiler, capture):
+    if capture is None:
+        return None
+    if profiler == 'cprofile':
+        capture.disable()
+        out = io.StringIO()
+        pstats.Stats(capture, stream=out).sort_stats('cumulative').print_stats(30)
+        return out.getvalue()
+    capture.stop()
+    return capture.output_text()
+
+
+class RoundTripCounter(monitoring.CommandListener):
+    # Counts every command sent to MongoDB (getMore batches included) against the active run
+    def started(self, event):
+        count('db_round_trips')
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        count('db_errors')
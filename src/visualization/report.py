@@ -0,0 +1,249 @@
+import base64
+import html
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from ..backtesting.metrics import METRIC_NAMES, MetricsAccumulator
+
+DEFAULT_MAX_POINTS = 2000
+HISTOGRAM_BINS = 100
+ROLLING_SHARPE_WINDOW = 30
+MAX_TRADE_MARKERS = 500
+FIGSIZE = (12, 6)
+
+
+def lttb(x, y, n_out):
+    """Indices of the Largest-Triangle-Three-Buckets downsample of (x, y) to n_out points.
+
+    Keeps the first and last point and, from each of n_out - 2 equal buckets, the point that
+    forms the largest triangle with the previously kept point and the next bucket's mean, so
+    peaks and troughs survive. NaNs in y are ignored.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = np.flatnonzero(~np.isnan(y))
+    n = len(valid)
+    if n_out >= n or n_out < 3:
+        return valid
+    if n < len(y):
+        x, y = x[valid], y[valid]
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # Mean of every bucket up front, plus the last point as the final "next bucket"
+    sums_x = np.add.reduceat(x[:n - 1], edges[:-1])
+    sums_y = np.add.reduceat(y[:n - 1], edges[:-1])
+    sizes = np.diff(edges)
+    mean_x = np.append(sums_x / sizes, x[-1])
+    mean_y = np.append(sums_y / sizes, y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        ax, ay = x[a], y[a]
+        cx, cy = mean_x[bucket + 1], mean_y[bucket + 1]
+        area = np.abs((ax - cx) * (y[start:stop] - ay) - (ax - x[start:stop]) * (cy - ay))
+        a = start + int(np.argmax(area))
+        selected[bucket + 1] = a
+    return valid[selected]
+
+
+def _rolling_sharpe(returns, index, window=ROLLING_SHARPE_WINDOW):
+    # The rolling Sharpe at the given bars only (same values as pandas rolling(window) there)
+    index = index[index >= window]
+    windows = returns[index[:, None] - np.arange(window - 1, -1, -1)]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return index, windows.mean(axis=1) / windows.std(axis=1, ddof=1) * np.sqrt(252)
+
+
+def prepare_charts(results, asset, max_points=DEFAULT_MAX_POINTS, metrics=None):
+    # All the heavy lifting on the full series; the output is a few thousand points per chart,
+    # cheap to pickle to a rendering worker. Pass the run's metrics to skip recomputing them.
+    dates = pd.to_datetime(results['date']).to_numpy(dtype='datetime64[ns]')
+    value = results['portfolio_value'].to_numpy(dtype=float)
+    price = results[f'{asset.lower()}_price'].to_numpy(dtype=float)
+    x = dates.view(np.int64).astype(float)
+    # One LTTB pass per distinct curve: every equity-derived panel reuses the equity's points
+    equity_index = lttb(x, value, max_points)
+    price_index = lttb(x, price, max_points)
+
+    returns = np.full(len(value), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(value[1:], value[:-1], out=returns[1:])
+        returns[1:] -= 1
+        peak = np.maximum.accumulate(value)
+        drawdown = value[equity_index] / peak[equity_index] - 1
+        cumulative = value[equity_index] / value[0] if len(value) else value
+        normalized_price = price[price_index] * (value[0] / price[0]) if len(price) else price
+    sharpe_index, rolling_sharpe = _rolling_sharpe(returns, equity_index)
+    finite = returns[np.isfinite(returns)]
+    counts, bin_edges = np.histogram(finite, bins=HISTOGRAM_BINS) if len(finite) else (np.zeros(0), np.zeros(1))
+
+    changes = np.diff(value, prepend=np.nan)
+    trade_bars = np.flatnonzero(changes != 0)
+    trade_bars = trade_bars[np.linspace(0, len(trade_bars) - 1, min(len(trade_bars), MAX_TRADE_MARKERS)).astype(int)] \
+        if len(trade_bars) else trade_bars
+    trade_change = changes[trade_bars]
+
+    if metrics is None:
+        accumulator = MetricsAccumulator(value[0] if len(value) else 1)
+        accumulator.update_many(value)
+        metrics = accumulator.metrics()
+    equity_dates = dates[equity_index]
+    return {
+        'asset': asset.upper(),
+        'bars': len(value),
+        'metrics': metrics,
+        'equity': (equity_dates, value[equity_index]),
+        'price': (dates[price_index], normalized_price),
+        'drawdown': (equity_dates, drawdown),
+        'cumulative': (equity_dates, cumulative),
+        'rolling_sharpe': (dates[sharpe_index], rolling_sharpe),
+        'raw_price': (dates[price_index], price[price_index]),
+        'histogram': (counts, bin_edges),
+        'buys': (dates[trade_bars[trade_change > 0]], price[trade_bars[trade_change > 0]]),
+        'sells': (dates[trade_bars[trade_change < 0]], price[trade_bars[trade_change < 0]]),
+    }
+
+
+def _draw_equity(ax, prepared):
+    ax.plot(*prepared['equity'], label='Portfolio Value')
+    ax.plot(*prepared['price'], label=f"{prepared['asset']} Price (Normalized)")
+    ax.legend()
+
+
+def _draw_drawdown(ax, prepared):
+    ax.plot(*prepared['drawdown'])
+    ax.fill_between(*prepared['drawdown'], 0, alpha=0.3)
+
+
+def _draw_returns(ax, prepared):
+    counts, bin_edges = prepared['histogram']
+    if len(counts):
+        ax.stairs(counts, bin_edges, fill=True, alpha=0.6)
+
+
+def _draw_trades(ax, prepared):
+    ax.plot(*prepared['raw_price'], label=f"{prepared['asset']} Price")
+    ax.scatter(*prepared['buys'], marker='^', color='g', label='Buy')
+    ax.scatter(*prepared['sells'], marker='v', color='r', label='Sell')
+    ax.legend()
+
+
+# name -> (title, x label, y label, draw(ax, prepared)); titles are formatted with asset and window
+CHARTS = {
+    'equity': ('Backtesting Results: Portfolio Value vs {asset} Price', 'Date', 'Value', _draw_equity),
+    'drawdown': ('Portfolio Drawdown', 'Date', 'Drawdown', _draw_drawdown),
+    'returns': ('Distribution of Daily Returns', 'Daily Return', 'Frequency', _draw_returns),
+    'cumulative': ('Cumulative Returns', 'Date', 'Cumulative Return',
+                   lambda ax, prepared: ax.plot(*prepared['cumulative'])),
+    'rolling_sharpe': ('{window}-Day Rolling Sharpe Ratio', 'Date', 'Sharpe Ratio',
+                       lambda ax, prepared: ax.plot(*prepared['rolling_sharpe'])),
+    'trades': ('{asset} Price with Trade Entry/Exit Points', 'Date', 'Price', _draw_trades),
+}
+
+
+def draw_charts(prepared, figure=None, charts=None):
+    # (name, figure) for each chart; the default matplotlib Figure draws headless, pyplot.figure on screen
+    if figure is None:
+        from matplotlib.figure import Figure as figure
+    drawn = []
+    for name in charts or CHARTS:
+        title, xlabel, ylabel, draw = CHARTS[name]
+        fig = figure(figsize=FIGSIZE)
+        ax = fig.add_subplot()
+        ax.set_title(title.format(asset=prepared['asset'], window=ROLLING_SHARPE_WINDOW))
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        draw(ax, prepared)
+        drawn.append((name, fig))
+    return drawn
+
+
+def _render_chart(job):
+    # One panel drawn headless to PNG bytes; runs in the rendering pool
+    prepared, chart, dpi = job
+    (_, fig), = draw_charts(prepared, charts=(chart,))
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi)
+    return buffer.getvalue()
+
+
+def _render_charts(jobs, max_workers=None):
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        return [_render_chart(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render_chart, jobs))
+
+
+def _write(prepared, images, output_dir, name, formats):
+    # Writes <name>_<chart>.png per chart and/or a self-contained <name>.html; returns the paths
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    if 'png' in formats:
+        for chart, image in images.items():
+            path = os.path.join(output_dir, f'{name}_{chart}.png')
+            with open(path, 'wb') as f:
+                f.write(image)
+            paths.append(path)
+    if 'html' in formats:
+        path = os.path.join(output_dir, f'{name}.html')
+        with open(path, 'w') as f:
+            f.write(_html(name, prepared, images))
+        paths.append(path)
+    return paths
+
+
+def render_prepared(prepared, output_dir, name='backtest', formats=('png',), dpi=100, max_workers=None):
+    # Every panel is encoded once and drawn in a process pool (max_workers=1 draws in-process)
+    images = _render_charts([(prepared, chart, dpi) for chart in CHARTS], max_workers)
+    return _write(prepared, dict(zip(CHARTS, images)), output_dir, name, formats)
+
+
+def render_report(results, asset, output_dir, name='backtest', formats=('png',), max_points=DEFAULT_MAX_POINTS,
+                  dpi=100, metrics=None, max_workers=None):
+    return render_prepared(prepare_charts(results, asset, max_points, metrics), output_dir, name, formats, dpi,
+                           max_workers)
+
+
+def render_batch(runs, asset, output_dir, formats=('png',), max_points=DEFAULT_MAX_POINTS, max_workers=None, dpi=100):
+    # runs maps a name to its results frame. Series are downsampled here and the panels of all
+    # runs are drawn together in one pool, so a handful of reports still keeps every worker busy.
+    prepared = {name: prepare_charts(results, asset, max_points) for name, results in runs.items()}
+    jobs = [(charts, chart, dpi) for charts in prepared.values() for chart in CHARTS]
+    images = iter(_render_charts(jobs, max_workers))
+    return {name: _write(charts, {chart: next(images) for chart in CHARTS}, output_dir, name, formats)
+            for name, charts in prepared.items()}
+
+
+def render_top_runs(optimizer, table, output_dir, top=5, formats=('png',), max_workers=None):
+    # Re-runs the best `top` rows of a ParameterOptimizer table and renders a report for each
+    from ..backtesting.backtester import Backtester
+    data = optimizer.load_data()
+    params = [column for column in table.columns if column not in METRIC_NAMES]
+    runs = {}
+    # to_dict keeps each column's own type (iterrows would turn int windows into floats next to float metrics)
+    best = table.head(top)
+    for rank, combo in zip(best.index, best[params].to_dict('records')):
+        backtester = Backtester(optimizer.strategy_class(**combo), data.index[0], data.index[-1],
+                                optimizer.initial_capital, symbol=optimizer.symbol)
+        label = f"rank{rank}_" + '_'.join(f"{key}{value}" for key, value in combo.items())
+        runs[label] = backtester.backtest(data)
+    return render_batch(runs, optimizer.symbol.split('-')[0], output_dir, formats=formats, max_workers=max_workers)
+
+
+def _html(name, prepared, images):
+    rows = ''.join(
+        f"<tr><td>{html.escape(key.replace('_', ' ').title())}</td><td>{value:.4f}</td></tr>"
+        for key, value in prepared['metrics'].items()
+    )
+    charts = ''.join(f'<h2>{html.escape(chart.replace("_", " ").title())}</h2>'
+                     f'<img src="data:image/png;base64,{base64.b64encode(image).decode("ascii")}" '
+                     f'alt="{html.escape(chart)}">' for chart, image in images.items())
+    return (f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(name)}</title></head><body>"
+            f"<h1>{html.escape(name)}</h1><p>{prepared['bars']} bars</p><table>{rows}</table>{charts}</body></html>")
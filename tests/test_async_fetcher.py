@@ -0,0 +1,106 @@
+import asyncio
+
+import pandas as pd
+import pytest
+from aiohttp import web
+
+from src.data_collection.async_fetcher import MAX_CANDLES_PER_REQUEST, AsyncCandleFetcher, CandleFetchError
+
+DAY = 86400
+START = pd.Timestamp('2024-01-01')
+
+
+def run(handler, symbols, start, end, **fetcher_kwargs):
+    # Serve `handler` on a local port and fetch from it; returns the frames and the requests the server saw
+    requests = []
+
+    async def candles(request):
+        requests.append((request.match_info['symbol'], dict(request.query)))
+        return await handler(request, len(requests))
+
+    async def main():
+        app = web.Application()
+        app.router.add_get('/products/{symbol}/candles', candles)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        fetcher = AsyncCandleFetcher(f"http://127.0.0.1:{port}", requests_per_second=None, **fetcher_kwargs)
+        try:
+            return await fetcher.fetch_many(symbols, start, end, DAY)
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(main()), requests
+
+
+def page(request, overlap=0):
+    # Coinbase rows, newest first, for every day of the requested window (plus `overlap` days past its end)
+    start = pd.Timestamp(request.query['start'])
+    end = pd.Timestamp(request.query['end']) + pd.Timedelta(days=overlap)
+    return [[int(ts.timestamp()), 1., 3., 2., ts.day, 10.]
+            for ts in reversed(pd.date_range(start, end, freq='D'))]
+
+
+async def ok(request, attempt):
+    return web.json_response(page(request))
+
+
+def test_long_range_is_split_into_300_candle_windows():
+    end = START + pd.Timedelta(days=999)
+    frames, requests = run(ok, ['BTC-USD', 'ETH-USD'], START, end)
+
+    assert len(requests) == 2 * 4
+    for _, query in requests:
+        span = pd.Timestamp(query['end']) - pd.Timestamp(query['start'])
+        assert span <= pd.Timedelta(days=MAX_CANDLES_PER_REQUEST - 1)
+    for symbol in ('BTC-USD', 'ETH-USD'):
+        pd.testing.assert_index_equal(frames[symbol].index, pd.date_range(START, end, freq='D'), check_names=False)
+
+
+def test_429_waits_for_retry_after():
+    async def limited(request, attempt):
+        if attempt == 1:
+            return web.Response(status=429, text='slow down', headers={'Retry-After': '0'})
+        return web.json_response(page(request))
+
+    # Exponential backoff would sleep for a minute; Retry-After says go again now
+    frames, requests = run(limited, ['BTC-USD'], START, START + pd.Timedelta(days=9), backoff_base=60, backoff_max=60)
+    assert len(requests) == 2
+    assert len(frames['BTC-USD']) == 10
+
+
+def test_5xx_is_retried_then_raises():
+    async def failing(request, attempt):
+        return web.Response(status=503, text='unavailable')
+
+    with pytest.raises(CandleFetchError, match='503'):
+        run(failing, ['BTC-USD'], START, START + pd.Timedelta(days=9), max_retries=2, backoff_base=0.01)
+
+
+def test_5xx_recovers_on_retry():
+    async def flaky(request, attempt):
+        if attempt <= 2:
+            return web.Response(status=502, text='bad gateway')
+        return web.json_response(page(request))
+
+    frames, requests = run(flaky, ['BTC-USD'], START, START + pd.Timedelta(days=9), max_retries=2, backoff_base=0.01)
+    assert len(requests) == 3
+    assert len(frames['BTC-USD']) == 10
+
+
+def test_overlapping_pages_are_deduplicated_and_sorted():
+    async def overlapping(request, attempt):
+        # Each newest-first page repeats the first days of the next window
+        return web.json_response(page(request, overlap=5))
+
+    end = START + pd.Timedelta(days=699)
+    frames, requests = run(overlapping, ['BTC-USD'], START, end)
+    frame = frames['BTC-USD']
+
+    assert len(requests) == 3
+    assert frame.index.is_unique and frame.index.is_monotonic_increasing
+    pd.testing.assert_index_equal(frame.index, pd.date_range(START, end + pd.Timedelta(days=5), freq='D'),
+                                  check_names=False)
+    assert (frame['close'] == frame.index.day).all()
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_processing.processor import OHLCV_COLUMNS
+from src.utils import database
+
+mongomock = pytest.importorskip('mongomock')
+
+DAY = 86400
+
+
+def candles(start, periods, base=100.):
+    index = pd.date_range(start, periods=periods, freq='D', name='timestamp')
+    close = base + np.arange(periods, dtype=float)
+    return pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                         'volume': np.full(periods, 10.)}, index=index)
+
+
+@pytest.fixture
+def db():
+    return database.Database(client=mongomock.MongoClient())
+
+
+def test_repeated_inserts_are_idempotent(db):
+    data = candles('2024-01-01', 30)
+    db.insert_historical_data('BTC-USD', data, DAY)
+    db.insert_historical_data('BTC-USD', data.iloc[10:20], DAY)
+    assert db.candles.count_documents({}) == 30
+
+    # An upsert overwrites the stored candle rather than adding a second one
+    revised = data.iloc[:1].assign(close=1.)
+    db.insert_historical_data('BTC-USD', revised, DAY)
+    stored = db.get_historical_data('BTC-USD', '2024-01-01', '2024-01-30', DAY)
+    assert len(stored) == 30
+    assert stored['close'].iloc[0] == 1.
+
+
+def test_symbols_and_granularities_stay_separate(db):
+    db.insert_historical_data('BTC-USD', candles('2024-01-01', 10, base=100.), DAY)
+    db.insert_historical_data('ETH-USD', candles('2024-01-01', 10, base=5.), DAY)
+    db.insert_historical_data('BTC-USD', candles('2024-01-01', 10, base=900.), 3600)
+
+    btc = db.get_historical_data('BTC-USD', '2024-01-01', '2024-01-10', DAY)
+    eth = db.get_historical_data('ETH-USD', '2024-01-01', '2024-01-10', DAY)
+    assert (btc['close'].to_numpy() == 100. + np.arange(10)).all()
+    assert (eth['close'].to_numpy() == 5. + np.arange(10)).all()
+    assert db.delete_historical_data('ETH-USD') == 10
+    assert len(db.get_historical_data('BTC-USD', '2024-01-01', '2024-01-10', DAY)) == 10
+
+
+def test_ranged_array_reads(db):
+    data = candles('2024-01-01', 60)
+    db.insert_historical_data('BTC-USD', data.sample(frac=1, random_state=0), DAY)
+
+    timestamps, values = db.get_historical_arrays('BTC-USD', '2024-01-10', '2024-01-19', DAY)
+    expected = data.loc['2024-01-10':'2024-01-19']
+    assert (timestamps == expected.index.to_numpy().astype('datetime64[ms]')).all()
+    np.testing.assert_array_equal(values, expected[OHLCV_COLUMNS].to_numpy())
+
+    timestamps, values = db.get_historical_arrays('BTC-USD', '2025-01-01', '2025-02-01', DAY)
+    assert len(timestamps) == 0 and values.shape == (0, len(OHLCV_COLUMNS))
+
+
+def test_results_round_trip_across_chunks(db, monkeypatch):
+    monkeypatch.setattr(database, 'RESULTS_CHUNK_ROWS', 7)
+    n = 20
+    results = pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=n, freq='h'),
+        'portfolio_value': np.linspace(1000., 1100., n),
+        'position': np.arange(n, dtype=np.float32),
+        'signal': np.tile([1, 0, -1, 0], n // 4).astype(np.int8),
+    })
+    run_id = db.insert_backtest_results('sma', results, params={'short_window': np.int64(5)},
+                                        metrics={'sharpe_ratio': np.float64(1.5)})
+
+    run = db.backtest_runs.find_one({'_id': run_id})
+    assert run['n_chunks'] == db.backtest_chunks.count_documents({'run_id': run_id}) == 3
+    assert run['params'] == {'short_window': 5}
+    pd.testing.assert_frame_equal(db.load_backtest_results(run_id), results)
+
+    assert db.delete_backtest_run(run_id) == 1
+    assert db.backtest_chunks.count_documents({}) == 0
+
+
+def test_best_run_ignores_nan_scores(db):
+    empty = pd.DataFrame({'portfolio_value': np.empty(0)})
+    for sharpe in (0.5, float('nan'), None, 2.0, -1.0):
+        db.insert_backtest_results('sma', empty, metrics={'sharpe_ratio': sharpe})
+    db.insert_backtest_results('rsi', empty, metrics={'sharpe_ratio': 9.0})
+    assert db.get_best_run('sma')['metrics']['sharpe_ratio'] == 2.0
+
+    db.insert_backtest_results('macd', empty, metrics={'sharpe_ratio': float('nan')})
+    assert db.get_best_run('macd') is None
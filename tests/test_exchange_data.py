@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_collection import exchange_data
+from src.data_collection.cache import OHLCVCache
+from src.data_processing.processor import OHLCV_COLUMNS
+from src.utils import database
+
+mongomock = pytest.importorskip('mongomock')
+
+SYMBOL = 'BTC-USD'
+DAY = 86400
+
+
+def candles(start, end):
+    index = pd.date_range(start, end, freq='D', name='timestamp')
+    close = np.linspace(100., 200., len(index))
+    return pd.DataFrame({'low': close - 1, 'high': close + 1, 'open': close, 'close': close,
+                         'volume': np.full(len(index), 10.)}, index=index)
+
+
+@pytest.fixture
+def api(monkeypatch, tmp_path):
+    # Mongo on mongomock, the local cache in tmp_path, and an exchange that has every day of 2024
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(database, 'get_client', lambda uri=None: client)
+    monkeypatch.setattr(exchange_data, '_cache', OHLCVCache(str(tmp_path)))
+    exchange = candles('2024-01-01', '2024-12-31')
+    calls = []
+
+    def fetch_candles(symbols, start, end, granularity):
+        calls.append((pd.Timestamp(start), pd.Timestamp(end)))
+        return {symbol: exchange.loc[start:end] for symbol in symbols}
+
+    monkeypatch.setattr(exchange_data, 'fetch_candles', fetch_candles)
+    return database.Database(), calls
+
+
+def test_partial_mongo_range_is_completed_from_the_api(api):
+    db, calls = api
+    db.insert_historical_data(SYMBOL, candles('2024-03-01', '2024-04-29'), DAY)
+
+    data = exchange_data.get_historical_data(SYMBOL, '2024-01-01', '2024-04-29', DAY)
+    assert calls == [(pd.Timestamp('2024-01-01'), pd.Timestamp('2024-02-29'))]
+    pd.testing.assert_index_equal(data.index, pd.date_range('2024-01-01', '2024-04-29', freq='D'), check_names=False)
+    assert len(db.get_historical_data(SYMBOL, '2024-01-01', '2024-04-29', DAY)) == len(data)
+
+    # The whole range is now covered locally
+    calls.clear()
+    assert len(exchange_data.get_historical_data(SYMBOL, '2024-01-01', '2024-04-29', DAY)) == len(data)
+    assert calls == []
+
+
+def test_holes_inside_the_mongo_range_are_fetched(api):
+    db, calls = api
+    db.insert_historical_data(SYMBOL, candles('2024-01-01', '2024-01-31'), DAY)
+    db.insert_historical_data(SYMBOL, candles('2024-03-01', '2024-03-31'), DAY)
+
+    data = exchange_data.fetch_historical_data(SYMBOL, '2024-01-01', '2024-04-10', DAY)
+    assert calls == [(pd.Timestamp('2024-02-01'), pd.Timestamp('2024-02-29')),
+                     (pd.Timestamp('2024-04-01'), pd.Timestamp('2024-04-10'))]
+    pd.testing.assert_index_equal(data.index, pd.date_range('2024-01-01', '2024-04-10', freq='D'), check_names=False)
+    assert list(data.columns) == OHLCV_COLUMNS
+
+
+def test_complete_mongo_range_skips_the_api(api):
+    db, calls = api
+    db.insert_historical_data(SYMBOL, candles('2024-01-01', '2024-01-31'), DAY)
+    assert len(exchange_data.fetch_historical_data(SYMBOL, '2024-01-01', '2024-01-31', DAY)) == 31
+    assert calls == []
@@ -0,0 +1,24 @@
+import numpy as np
+
+from src.backtesting.execution import ExecutionModel
+from src.backtesting.vectorized import simulate
+
+CLOSE = np.array([100., 101., 102., 103., 90., 91.])
+BUY_ON_BAR_1 = np.array([0., 1., 0., 0., 0., 0.])
+
+
+def test_zero_volume_buy_is_no_fill():
+    execution = ExecutionModel(max_volume_pct=0.1)
+    assert execution.buy(800, 101., 0.) == (0., 0., None)
+    capital, position, _ = simulate(CLOSE, BUY_ON_BAR_1, 1000, execution=execution,
+                                    volume=np.array([10., 0., 10., 10., 10., 10.]))
+    assert (position == 0).all()
+    assert (capital == 1000).all()
+
+
+def test_volume_capped_stop_keeps_exiting():
+    # The stop on bar 4 can only sell 0.05 units per bar, so the rest keeps its stop and sells on later bars
+    execution = ExecutionModel(max_volume_pct=0.1)
+    _, position, _ = simulate(CLOSE, BUY_ON_BAR_1, 1000, execution=execution,
+                              volume=np.array([10., 100., 10., 0.5, 0.5, 0.5]))
+    assert position[3] > position[4] > position[5] > 0
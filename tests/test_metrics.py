@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtesting.metrics import MetricsAccumulator
+
+INITIAL_CAPITAL = 1000.
+
+
+def pandas_metrics(values, initial_capital=INITIAL_CAPITAL):
+    # Backtester.calculate_metrics before the accumulator replaced it
+    results = pd.DataFrame({'portfolio_value': values})
+    if results.empty:
+        return {'total_return': 0, 'sharpe_ratio': 0, 'max_drawdown': 0}
+
+    total_return = (results['portfolio_value'].iloc[-1] - initial_capital) / initial_capital
+    daily_returns = results['portfolio_value'].pct_change()
+    sharpe_ratio = (daily_returns.mean() / daily_returns.std()) * np.sqrt(252)
+    max_drawdown = (results['portfolio_value'] / results['portfolio_value'].cummax() - 1).min()
+
+    annualized_return = (1 + total_return) ** (365 / len(results)) - 1
+    volatility = daily_returns.std() * np.sqrt(252)
+    sortino_ratio = (daily_returns.mean() / daily_returns[daily_returns < 0].std()) * np.sqrt(252)
+
+    peak = results['portfolio_value'].cummax()
+    drawdown = (results['portfolio_value'] - peak) / peak
+    calmar_ratio = annualized_return / abs(drawdown.min()) if drawdown.min() != 0 else np.inf
+
+    trades = results['portfolio_value'].diff() != 0
+    wins = (results['portfolio_value'].diff()[trades] > 0).sum()
+    win_rate = wins / trades.sum() if trades.sum() > 0 else 0
+
+    gains = results['portfolio_value'].diff()[results['portfolio_value'].diff() > 0].sum()
+    losses = abs(results['portfolio_value'].diff()[results['portfolio_value'].diff() < 0].sum())
+    profit_factor = gains / losses if losses != 0 else np.inf
+
+    return {
+        'total_return': total_return,
+        'annualized_return': annualized_return,
+        'sharpe_ratio': sharpe_ratio,
+        'sortino_ratio': sortino_ratio,
+        'calmar_ratio': calmar_ratio,
+        'max_drawdown': max_drawdown,
+        'volatility': volatility,
+        'win_rate': win_rate,
+        'profit_factor': profit_factor
+    }
+
+
+def pandas_trade_stats(values):
+    # main.py's create_trade_log and the statistics it printed from the log
+    results = pd.DataFrame({'portfolio_value': values})
+    trade_log = results[results['portfolio_value'].diff() != 0].copy()
+    trade_log['trade_return'] = trade_log['portfolio_value'].pct_change()
+    return {
+        'total_trades': len(trade_log),
+        'winning_trades': len(trade_log[trade_log['trade_return'] > 0]),
+        'losing_trades': len(trade_log[trade_log['trade_return'] < 0]),
+        'average_win': trade_log[trade_log['trade_return'] > 0]['trade_return'].mean(),
+        'average_loss': trade_log[trade_log['trade_return'] < 0]['trade_return'].mean(),
+        'best_trade': trade_log['trade_return'].max(),
+        'worst_trade': trade_log['trade_return'].min()
+    }
+
+
+def backtest_like(n, seed):
+    # Equity curve that is flat between trades and moves with the price while in a position
+    rng = np.random.default_rng(seed)
+    price = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    in_position = np.repeat(rng.random(n // 10 + 1) < 0.5, 10)[:n]
+    cash = INITIAL_CAPITAL * 0.2
+    return np.where(in_position, cash + 8 * price, INITIAL_CAPITAL * np.exp(rng.normal(0, 0.001)))
+
+
+SERIES = {
+    'backtest': backtest_like(500, 0),
+    'backtest_short': backtest_like(37, 1),
+    'random_walk': INITIAL_CAPITAL * np.exp(np.cumsum(np.random.default_rng(2).normal(0, 0.01, 300))),
+    'constant': np.full(50, INITIAL_CAPITAL),
+    'single_bar': np.array([1100.]),
+    'two_bars': np.array([1000., 900.]),
+    'only_gains': np.linspace(1000., 2000., 40),
+    'to_zero': np.array([1000., 800., 0., 0., 0.]),
+    'zero_start': np.array([0., 0., 500., 1000., 900.]),
+    'all_zero': np.zeros(5),
+}
+
+
+def fed_per_value(values):
+    accumulator = MetricsAccumulator(INITIAL_CAPITAL)
+    for value in values:
+        accumulator.update(value)
+    return accumulator
+
+
+def fed_in_chunks(values, sizes):
+    accumulator = MetricsAccumulator(INITIAL_CAPITAL)
+    start = 0
+    for size in sizes:
+        accumulator.update_many(values[start:start + size])
+        start += size
+    accumulator.update_many(values[start:])
+    return accumulator
+
+
+def feeds(values):
+    yield 'whole', fed_in_chunks(values, [])
+    yield 'per_value', fed_per_value(values)
+    yield 'chunks', fed_in_chunks(values, [1, 0, 2, 7, 1, 30, 0, 64])
+    mixed = MetricsAccumulator(INITIAL_CAPITAL)
+    half = len(values) // 2
+    for value in values[:half]:
+        mixed.update(value)
+    mixed.update_many(values[half:])
+    yield 'mixed', mixed
+
+
+def assert_same(actual, expected):
+    # Chunked and per-value sums round differently from pandas in the last bits only
+    assert actual.keys() == expected.keys()
+    for key in expected:
+        np.testing.assert_allclose(actual[key], expected[key], rtol=1e-12, atol=0, equal_nan=True, err_msg=key)
+
+
+@pytest.mark.parametrize('name', SERIES)
+def test_matches_pandas_metrics(name):
+    values = SERIES[name]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected_metrics = pandas_metrics(values)
+        expected_stats = pandas_trade_stats(values)
+        for feed, accumulator in feeds(values):
+            assert accumulator.count == len(values), feed
+            assert_same(accumulator.metrics(), expected_metrics)
+            assert_same(accumulator.trade_stats(), expected_stats)
+
+
+def test_empty_series():
+    accumulator = MetricsAccumulator(INITIAL_CAPITAL)
+    accumulator.update_many(np.empty(0))
+    assert accumulator.metrics() == pandas_metrics(np.empty(0))
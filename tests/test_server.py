@@ -0,0 +1,77 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from src.runner.server import request, serve, shutdown, worker_stats
+
+AUTHKEY = b'test-authkey'
+
+
+class FakeWorker:
+    jobs_run = 0
+
+    def run_many(self, jobs, return_results=False):
+        self.jobs_run += len(jobs)
+        return [{'name': job.get('name')} for job in jobs]
+
+    def stats(self):
+        return {'jobs_run': self.jobs_run}
+
+
+@pytest.fixture
+def address():
+    with socket.socket() as probe:
+        probe.bind(('localhost', 0))
+        address = probe.getsockname()
+    thread = threading.Thread(target=serve, args=(address, AUTHKEY, FakeWorker(), 1.), daemon=True)
+    thread.start()
+    for _ in range(100):
+        try:
+            socket.create_connection(address).close()
+            break
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+    yield address
+    if thread.is_alive():
+        shutdown(address, AUTHKEY)
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_silent_client_cannot_block_the_worker(address):
+    with socket.create_connection(address) as sock:
+        # Connected without authenticating or sending anything: other clients are served meanwhile
+        started = time.perf_counter()
+        assert worker_stats(address, AUTHKEY) == {'jobs_run': 0}
+        assert time.perf_counter() - started < 0.5
+        # and the worker hangs up on us once the 1s deadline passes
+        sock.settimeout(5)
+        sock.recv(1024)  # the authkey challenge
+        assert sock.recv(1024) == b''
+        assert time.perf_counter() - started < 3
+
+
+def test_trickling_request_is_cut_off(address):
+    with socket.create_connection(address) as sock:
+        sock.settimeout(5)
+        sock.recv(1024)  # the authkey challenge
+        sock.sendall(b'\x00\x00')  # half of a length prefix, then nothing
+        assert worker_stats(address, AUTHKEY) == {'jobs_run': 0}
+        assert sock.recv(1024) == b''
+
+
+def test_malformed_requests_get_errors(address):
+    with pytest.raises(RuntimeError, match='Expected a dict request'):
+        request(['not', 'a', 'dict'], address, AUTHKEY)
+    with pytest.raises(RuntimeError, match="needs a 'jobs' list"):
+        request({'command': 'run'}, address, AUTHKEY)
+    assert request({'command': 'run', 'jobs': [{'name': 'a'}]}, address, AUTHKEY) == [{'name': 'a'}]
+
+
+def test_wrong_authkey_is_rejected(address):
+    from multiprocessing import AuthenticationError
+    with pytest.raises(AuthenticationError):
+        worker_stats(address, b'wrong')
+    assert worker_stats(address, AUTHKEY) == {'jobs_run': 0}
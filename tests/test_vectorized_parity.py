@@ -0,0 +1,96 @@
+"""The vectorized engine must reproduce the bar-by-bar loop exactly, bar for bar."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import random_walk_ohlcv
+from src.backtesting.backtester import Backtester
+from src.data_processing.bars import compact_ohlcv
+from src.strategy.indicator_cache import IndicatorCache
+from src.strategy.rsi_strategy import RSIStrategy
+from src.strategy.simple_moving_average import SMACrossoverStrategy
+
+SEEDS = range(6)
+STRATEGIES = {
+    'sma_5_10': lambda: SMACrossoverStrategy(short_window=5, long_window=10),
+    'sma_2_30': lambda: SMACrossoverStrategy(short_window=2, long_window=30),
+    'sma_20_50': lambda: SMACrossoverStrategy(short_window=20, long_window=50),
+    'rsi_default': lambda: RSIStrategy(),
+    'rsi_loose': lambda: RSIStrategy(rsi_period=5, overbought=60, oversold=40, support_resistance_periods=5, bb_std=1),
+}
+
+
+def daily_candles(seed):
+    # Volatile daily candles so stops, take-profits and RSI entries all fire
+    return random_walk_ohlcv(300 + 20 * seed, seed=seed, granularity=86400, start='2020-01-01',
+                             volatility=0.02 + 0.01 * (seed % 4), spread=0.01)
+
+
+def backtest(make_strategy, data, vectorized):
+    backtester = Backtester(make_strategy(), '2020-01-01', '2021-12-31', 1000, symbol='SOL-USD')
+    results = backtester.backtest(data, vectorized=vectorized)
+    return backtester, results
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('strategy', sorted(STRATEGIES))
+def test_vectorized_matches_loop(strategy, seed):
+    data = daily_candles(seed)
+    loop, loop_results = backtest(STRATEGIES[strategy], data, vectorized=False)
+    vectorized, vectorized_results = backtest(STRATEGIES[strategy], data, vectorized=True)
+
+    np.testing.assert_array_equal(vectorized_results['position'], loop_results['position'])
+    np.testing.assert_array_equal(vectorized_results['portfolio_value'], loop_results['portfolio_value'])
+    trades = np.flatnonzero(np.diff(loop_results['position'].to_numpy()))
+    np.testing.assert_array_equal(np.flatnonzero(np.diff(vectorized_results['position'].to_numpy())), trades)
+    pd.testing.assert_frame_equal(vectorized_results, loop_results, check_exact=True)
+
+    assert vectorized.current_capital == loop.current_capital
+    assert vectorized.positions == loop.positions
+    np.testing.assert_equal(vectorized.calculate_metrics(vectorized_results), loop.calculate_metrics(loop_results))
+
+
+@pytest.mark.parametrize('strategy', sorted(STRATEGIES))
+def test_parity_data_trades(strategy):
+    # Guards the fixture: parity over runs that never trade would prove nothing
+    trades = sum(np.count_nonzero(np.diff(backtest(STRATEGIES[strategy], daily_candles(seed), True)[1]['position']))
+                 for seed in SEEDS)
+    assert trades > 0
+
+
+@pytest.mark.parametrize('vectorized', [False, True])
+def test_support_resistance_only_when_provided(vectorized):
+    data = daily_candles(0)
+    sma = backtest(STRATEGIES['sma_5_10'], data, vectorized)[1]
+    rsi = backtest(STRATEGIES['rsi_default'], data, vectorized)[1]
+    assert list(sma.columns) == ['date', 'portfolio_value', 'sol_price', 'position']
+    assert list(rsi.columns) == ['date', 'portfolio_value', 'sol_price', 'position', 'support', 'resistance']
+
+
+@pytest.mark.parametrize('strategy', ['sma_5_10', 'rsi_default'])
+def test_timezone_aware_bars(strategy):
+    data = daily_candles(1)
+    data.index = data.index.tz_localize('UTC').tz_convert('America/New_York')
+    loop_results = backtest(STRATEGIES[strategy], data, vectorized=False)[1]
+    vectorized_results = backtest(STRATEGIES[strategy], data, vectorized=True)[1]
+    assert str(loop_results['date'].dtype) == 'datetime64[ns, America/New_York]'
+    pd.testing.assert_frame_equal(vectorized_results, loop_results, check_exact=True)
+
+
+@pytest.mark.parametrize('strategy', ['sma_5_10', 'rsi_default'])
+def test_float32_stays_float32(strategy):
+    # float32 candles give float32 indicators and results, and int8 signals, with no float64 copies
+    data = compact_ohlcv(daily_candles(2))
+    cache = IndicatorCache()
+    backtester = Backtester(STRATEGIES[strategy](), '2020-01-01', '2021-12-31', 1000, symbol='SOL-USD',
+                            indicator_cache=cache, dtype=np.float32)
+    output = backtester.generate_signals(data)
+    signals = output[0] if isinstance(output, tuple) else output
+    assert signals.dtype == np.int8
+    assert {value.dtype for entry in cache._entries.values()
+            for value in (entry if isinstance(entry, tuple) else (entry,))} == {np.dtype(np.float32)}
+
+    results = backtester.backtest(data)
+    assert (results.drop(columns='date').dtypes == np.float32).all()
+    reference = backtest(STRATEGIES[strategy], daily_candles(2), vectorized=True)[1]
+    np.testing.assert_allclose(results['portfolio_value'], reference['portfolio_value'], rtol=1e-4)
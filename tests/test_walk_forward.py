@@ -0,0 +1,39 @@
+import numpy as np
+
+from benchmarks.synthetic import random_walk_ohlcv
+from src.backtesting.walk_forward import evaluate_fold
+
+FOLD = (0, 200, 200, 300)
+
+
+def fold_inputs(signal_rows):
+    close = random_walk_ohlcv(300, seed=3, granularity=86400, volatility=0.03)['close'].to_numpy()
+    return close, np.asarray(signal_rows, dtype=float)
+
+
+def alternating(n, period):
+    signals = np.zeros(n)
+    signals[period::2 * period] = 1
+    signals[2 * period::2 * period] = -1
+    return signals
+
+
+def evaluate(close, signals):
+    return evaluate_fold(FOLD, close, signals, 1000, 'sharpe_ratio', stop_loss_pct=0.05, take_profit_pct=0.1)
+
+
+def test_nan_train_score_does_not_win():
+    # Combo 0 never trades, so its train Sharpe is NaN; a later combo with a finite score must be picked
+    close, signals = fold_inputs([np.zeros(300), alternating(300, 5), alternating(300, 11)])
+    best, train_metrics, _, _ = evaluate(close, signals)
+    assert np.isnan(evaluate(close, signals[:1])[1]['sharpe_ratio'])
+    assert best != 0
+    assert np.isfinite(train_metrics['sharpe_ratio'])
+
+
+def test_all_nan_train_scores_fall_back_to_first_combo():
+    close, signals = fold_inputs([np.zeros(300), np.zeros(300)])
+    best, train_metrics, test_metrics, test_value = evaluate(close, signals)
+    assert best == 0
+    assert np.isnan(train_metrics['sharpe_ratio'])
+    assert len(test_value) == FOLD[3] - FOLD[2]